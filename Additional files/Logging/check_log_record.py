@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Compare every LogRecord attribute between stdlib logging and my_logging.
+
+For each attribute the record can carry, a %-, {}- and $-style format
+printing just that attribute is run, and the records' __dict__ (keys in
+order and values) are compared too. The clock is frozen so created,
+msecs, relativeCreated and asctime match between the two runs. Where
+os.fork exists, a record logged in a forked child must carry the child's
+PID.
+"""
+import importlib.util, io, os, re, sys, time
+import logging as stdlog
+
+# --- Frozen clock (before my_logging binds time.time / time.time_ns) ---
+FIXED_NS = 1_725_875_200_999_999_900   # rounds up to the next second as a float
+time.time_ns = lambda: FIXED_NS
+time.time = lambda: FIXED_NS / 1e9
+
+ATTRS = ["name", "msg", "args", "levelname", "levelno", "pathname", "filename",
+         "module", "exc_info", "exc_text", "stack_info", "lineno", "funcName",
+         "created", "msecs", "relativeCreated", "thread", "threadName",
+         "processName", "process", "message", "asctime"]
+if sys.version_info >= (3, 12):
+    ATTRS.insert(ATTRS.index("process") + 1, "taskName")
+
+def formats():
+    for attr in ATTRS:
+        yield "%s=%%(%s)s" % (attr, attr), "%"
+        yield "%s={%s}" % (attr, attr), "{"
+        yield "%s=$%s" % (attr, attr), "$"
+
+class CaptureHandler(stdlog.Handler):
+    """Keeps a copy of each record's __dict__ once the formatters ran."""
+    def __init__(self):
+        super().__init__()
+        self.dicts = []
+
+    def emit(self, record):
+        self.dicts.append(dict(record.__dict__))
+
+def load_my_logging_module():
+    here = os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(here, "..", "..", "Logging_bench", "my_logging.py")
+    spec = importlib.util.spec_from_file_location("my_logging", path)
+    my = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    spec.loader.exec_module(my)  # type: ignore
+    return my
+
+def emit_sequence(logger):
+    logger.debug("plain")
+    logger.info("args %s %d", "a", 1)
+    logger.warning("mapping %(k)s", {"k": 1})
+    try:
+        raise ValueError("demo error")
+    except ValueError:
+        logger.exception("caught")
+    logger.error("with stack", stack_info=True)
+    logger.info("extra", extra={"custom": "C"})
+
+def run(mod):
+    lg = mod.getLogger("check")
+    lg.handlers[:] = []
+    lg.propagate = False
+    lg.setLevel(mod.DEBUG)
+    streams = []
+    for fmt, style in formats():
+        buf = io.StringIO()
+        h = mod.StreamHandler(buf)
+        h.setFormatter(mod.Formatter(fmt, style=style))
+        lg.addHandler(h)
+        streams.append((fmt, buf))
+    capture = CaptureHandler()
+    lg.addHandler(capture)
+    emit_sequence(lg)
+    lg.handlers[:] = []
+    return [(fmt, buf.getvalue()) for fmt, buf in streams], capture.dicts
+
+# Object addresses (exc_info's traceback) differ between the runs
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+def normalized(value):
+    if isinstance(value, tuple) and len(value) == 3 and isinstance(value[1], BaseException):
+        value = (value[0], str(value[1]))   # exc_info
+    return _ADDRESS.sub(" at 0x?", repr(value))
+
+def forked_process_field(mod):
+    """record.process logged in a forked child, and the child's real PID."""
+    lg = mod.getLogger("check.fork")
+    capture = CaptureHandler()
+    lg.addHandler(capture)
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        lg.warning("child")
+        os.write(w, b"%d %d" % (capture.dicts[-1]["process"], os.getpid()))
+        os._exit(0)
+    os.waitpid(pid, 0)
+    os.close(w)
+    logged, real = map(int, os.read(r, 64).split())
+    os.close(r)
+    lg.removeHandler(capture)
+    return logged, real
+
+def main():
+    results = []
+    for patched in (False, True):
+        mod = load_my_logging_module() if patched else stdlog
+        results.append(run(mod))   # one call site: same stack_info text
+    (std_out, std_dicts), (my_out, my_dicts) = results
+    mylog = mod
+
+    failures = 0
+    for (fmt, a), (_, b) in zip(std_out, my_out):
+        if _ADDRESS.sub("", a) != _ADDRESS.sub("", b):
+            failures += 1
+            print("FORMAT %r differs:\n  std: %r\n  my:  %r" % (fmt, a, b))
+    for i, (a, b) in enumerate(zip(std_dicts, my_dicts)):
+        a = [(k, normalized(v)) for k, v in a.items()]
+        b = [(k, normalized(v)) for k, v in b.items()]
+        if a != b:
+            failures += 1
+            print("RECORD %d __dict__ differs:\n  std: %s\n  my:  %s" % (i, a, b))
+    if hasattr(os, "fork"):
+        logged, real = forked_process_field(mylog)
+        if logged != real:
+            failures += 1
+            print("FORKED CHILD logs process=%d, its PID is %d" % (logged, real))
+    if failures:
+        sys.exit("%d differences" % failures)
+    print("OK: %d attributes x 3 styles and %d records are IDENTICAL (Python %s)."
+          % (len(ATTRS), len(std_dicts), sys.version.split()[0]))
+
+if __name__ == "__main__":
+    main()
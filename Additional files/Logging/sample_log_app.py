@@ -4,8 +4,8 @@ import logging as stdlog
 
 # --- Fixed-time formatter (keeps output identical across runs) ---
 class FixedTimeFormatter(stdlog.Formatter):
-    def __init__(self, fmt, fixed_epoch):
-        super().__init__(fmt)
+    def __init__(self, fmt, fixed_epoch, style="%"):
+        super().__init__(fmt, style=style)
         self.fixed_epoch = fixed_epoch
 
     def formatTime(self, record, datefmt=None):
@@ -15,19 +15,19 @@ class FixedTimeFormatter(stdlog.Formatter):
         base = time.strftime("%Y-%m-%d %H:%M:%S", ct)
         return f"{base},000"
 
-def build_logger(mod, stream, fmt, fixed_epoch):
+def build_logger(mod, stream, fmt, fixed_epoch, style="%"):
     lg = mod.getLogger("demo")
     lg.handlers[:] = []
     lg.propagate = False
     lg.setLevel(mod.DEBUG)
     h = mod.StreamHandler(stream)
-    h.setFormatter(FixedTimeFormatter(fmt, fixed_epoch))
+    h.setFormatter(FixedTimeFormatter(fmt, fixed_epoch, style))
     lg.addHandler(h)
     return lg
 
 def load_my_logging_module():
     here = os.path.dirname(os.path.abspath(__file__))
-    path = os.path.join(here, "my_logging.py")
+    path = os.path.join(here, "..", "..", "Logging_bench", "my_logging.py")
     spec = importlib.util.spec_from_file_location("my_logging", path)
     my = importlib.util.module_from_spec(spec)
     assert spec and spec.loader
@@ -52,15 +52,29 @@ def save_log(filename, content):
     with open(filename, "w", encoding="utf-8") as f:
         f.write(content)
 
+# (format, style) pairs compared between the two runs
+FORMATS = [
+    ("%(asctime)s %(levelname)s %(name)s [pid=%(process)d tid=%(thread)d] %(filename)s:%(lineno)d - %(message)s", "%"),
+    ("%(asctime)s %(levelname)s %(name)s [%(process)d/%(thread)d] %(message)s", "%"),
+    ("%(levelname)-8s|%(lineno)04d|%(levelno)02d %(module)s.%(funcName)s %(threadName)s/%(processName)s 100%% %(message)r", "%"),
+    ("{asctime} {levelname:<8} {name!r} [{process}/{thread}] {filename}:{lineno:>4} {{ {message} }}", "{"),
+    ("${asctime} $levelname ${name}: $module.$funcName $$ $message", "$"),
+]
+
+def run_all(mod, fixed_epoch):
+    out = []
+    for fmt, style in FORMATS:
+        buf = io.StringIO()
+        lg = build_logger(mod, buf, fmt, fixed_epoch, style)
+        emit_sequence(mod, lg)
+        out.append(buf.getvalue())
+    return "".join(out)
+
 def main():
-    fmt = "%(asctime)s %(levelname)s %(name)s [pid=%(process)d tid=%(thread)d] %(filename)s:%(lineno)d - %(message)s"
     fixed_epoch = 1_725_875_200
 
     # STD run
-    buf_std = io.StringIO()
-    lg_std = build_logger(stdlog, buf_std, fmt, fixed_epoch)
-    emit_sequence(stdlog, lg_std)
-    out_std = buf_std.getvalue()
+    out_std = run_all(stdlog, fixed_epoch)
     print("=== STD OUTPUT ===")
     print(out_std)
     save_log("std_log.txt", out_std)
@@ -69,10 +83,7 @@ def main():
     mylog = load_my_logging_module()
     if hasattr(mylog, "refresh_logging_needs"):
         mylog.refresh_logging_needs()
-    buf_my = io.StringIO()
-    lg_my = build_logger(mylog, buf_my, fmt, fixed_epoch)
-    emit_sequence(mylog, lg_my)
-    out_my = buf_my.getvalue()
+    out_my = run_all(mylog, fixed_epoch)
     print("=== MY OUTPUT ===")
     print(out_my)
     save_log("my_log.txt", out_my)
@@ -23,6 +23,10 @@ def run_one(mode: str, args, out_json: str, perf_data: str):
         f"--formatter {args.formatter} "
         f"{'--use-queue' if args.use_queue else ''} "
         f"{'--propagate' if args.propagate else ''} "
+        f"--depth {args.depth} "
+        f"{'--caller-handler' if args.caller_handler else ''} "
+        f"--startup-loggers {args.startup_loggers} "
+        f"{'--record-stats' if args.record_stats else ''} "
         f"{f'--max-seconds {args.max_seconds}' if args.max_seconds > 0 else ''} "
         f"--out {shlex.quote(out_json)}"
     ).strip()
@@ -35,6 +39,11 @@ def read_mean_std(path: str):
         data = json.load(f)
     return data["stats"]["mean_sec"], data["stats"]["stdev_sec"]
 
+def read_records(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("records")
+
 def main():
     p = argparse.ArgumentParser(description="Run perf+benchmark for logging (STD vs MY) and compare.")
     p.add_argument("--bench", default="custom_logging_benchmark.py", help="Path to custom_logging_benchmark.py")
@@ -45,6 +54,10 @@ def main():
     p.add_argument("--formatter", choices=["message", "simple", "detailed"], default="message")
     p.add_argument("--use-queue", action="store_true")
     p.add_argument("--propagate", action="store_true")
+    p.add_argument("--depth", type=int, default=1)
+    p.add_argument("--caller-handler", action="store_true")
+    p.add_argument("--startup-loggers", type=int, default=0)
+    p.add_argument("--record-stats", action="store_true")
     p.add_argument("--max-seconds", type=float, default=0.0)
     p.add_argument("--perf-freq", type=int, default=99, help="perf sampling frequency (Hz)")
     p.add_argument("--std-json", default="logging_std.json")
@@ -69,6 +82,13 @@ def main():
         f"MY  logging: Mean +- std dev: {mm:.3f} s +- {sm:.3f} s\n"
         f"Improvement: {speedup:.2f}% faster\n"
     )
+    if args.record_stats:
+        rs, rm = read_records(args.std_json), read_records(args.my_json)
+        if rs and rm:
+            result_txt += (
+                f"STD LogRecord: {rs['ns_per_record']:.0f} ns, {rs['bytes_per_record']:.0f} bytes\n"
+                f"MY  LogRecord: {rm['ns_per_record']:.0f} ns, {rm['bytes_per_record']:.0f} bytes\n"
+            )
 
     print(result_txt)
 
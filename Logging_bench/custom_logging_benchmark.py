@@ -42,8 +42,9 @@ def _build_logger(use_queue: bool, handler_type: str, formatter: str, propagate:
     # handler choice (avoid real disk I/O by default)
     if handler_type == "null":
         class NullHandler(logging.Handler):
-            def emit(self, record):  # no-op
-                pass
+            # Goes through handle() like any handler, then drops the record
+            # with the stdlib's no-op emit (which reads no record field).
+            emit = logging.NullHandler.emit
         h = NullHandler()
     elif handler_type == "file":
         # Use a NamedTemporaryFile to avoid blocking issues with StringIO/fileno quirks
@@ -185,6 +186,43 @@ def _run_once(logger, messages: List[str], levels: List[str], do_enabled_checks:
     end = time.perf_counter()
     return end - start
 
+def _configure_loggers(prefix: str, count: int) -> float:
+    """Give `count` fresh module-style loggers a formatted handler each, timed."""
+    import logging
+    names = [f"{prefix}.mod{i}" for i in range(count)]
+    fmt = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+    start = time.perf_counter()
+    for name in names:
+        lg = logging.getLogger(name)
+        h = logging.NullHandler()
+        h.setFormatter(logging.Formatter(fmt))
+        lg.addHandler(h)
+    end = time.perf_counter()
+
+    for name in names:
+        logging.getLogger(name).handlers[:] = []
+    return end - start
+
+def _measure_records(logger, count: int) -> Dict[str, float]:
+    """CPU time and traced allocation per record from the active LogRecord factory."""
+    import logging
+    import tracemalloc
+    factory = logging.getLogRecordFactory()
+    record_args = (logger.name, logging.INFO, __file__, 1, "msg %s", ("value",), None, "func")
+
+    start = time.perf_counter()
+    for _ in range(count):
+        factory(*record_args)
+    cpu_ns = (time.perf_counter() - start) / count * 1e9
+
+    tracemalloc.start()
+    records = [factory(*record_args) for _ in range(count)]
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return {"ns_per_record": cpu_ns, "bytes_per_record": traced / count}
+
 # ------------------------ Benchmark core ------------------------
 
 def _level_mix(args) -> Dict[str, float]:
@@ -201,6 +239,14 @@ def run_benchmark(args) -> Dict[str, Any]:
 
     import logging
 
+    if args.startup_loggers:
+        # Startup cost: configure many loggers (fresh names every run)
+        for i in range(args.warmup):
+            _configure_loggers(f"startup_warmup{i}", args.startup_loggers)
+        times = [_configure_loggers(f"startup{i}", args.startup_loggers)
+                 for i in range(args.repeat)]
+        return _result(args, times)
+
     logger = _build_logger(
         use_queue=args.use_queue,
         handler_type=args.handler,
@@ -211,24 +257,50 @@ def run_benchmark(args) -> Dict[str, Any]:
     # Effective filter level
     logger.setLevel(logging.DEBUG if args.debug_ratio > 0 else logging.INFO)
 
+    # A debug handler that formats caller info, on an unrelated logger
+    side_logger = None
+    if args.caller_handler:
+        side_logger = logging.getLogger("bench_debug")
+        side_logger.propagate = False
+        side_handler = logging.StreamHandler(io.StringIO())
+        side_handler.setFormatter(logging.Formatter("%(filename)s:%(lineno)d %(message)s"))
+        side_logger.addHandler(side_handler)
+
+    # Log through a descendant --depth levels below the configured logger;
+    # records propagate up to its handlers (depth 1 = the logger itself)
+    hot_logger = logger
+    for i in range(1, args.depth):
+        hot_logger = hot_logger.getChild(f"l{i}")
+
     # Prepare deterministic workload upfront
     msgs = _generate_messages(args.num_messages)
     levels = _make_level_sequence(args.num_messages, _level_mix(args))
 
     times: List[float] = []
+    record_stats = None
     try:
         # Warmup
         for _ in range(args.warmup):
-            _run_once(logger, msgs[: max(1, args.num_messages // 10)], levels[: max(1, args.num_messages // 10)],
+            _run_once(hot_logger, msgs[: max(1, args.num_messages // 10)], levels[: max(1, args.num_messages // 10)],
                       args.enabled_checks, max_seconds=min(0.5, args.max_seconds))
 
         # Repeats (timed)
         for _ in range(args.repeat):
-            dt = _run_once(logger, msgs, levels, args.enabled_checks, max_seconds=args.max_seconds)
+            dt = _run_once(hot_logger, msgs, levels, args.enabled_checks, max_seconds=args.max_seconds)
             times.append(dt)
+        if args.record_stats:
+            record_stats = _measure_records(hot_logger, args.num_messages)
     finally:
         _teardown_logger(logger)
+        if side_logger is not None:
+            side_logger.handlers[:] = []
+
+    result = _result(args, times)
+    if record_stats is not None:
+        result["records"] = record_stats
+    return result
 
+def _result(args, times: List[float]) -> Dict[str, Any]:
     return {
         "benchmark": "custom_logging_benchmark",
         "mode": args.mode,
@@ -241,6 +313,10 @@ def run_benchmark(args) -> Dict[str, Any]:
             "handler": args.handler,
             "formatter": args.formatter,
             "propagate": args.propagate,
+            "depth": args.depth,
+            "caller_handler": args.caller_handler,
+            "startup_loggers": args.startup_loggers,
+            "record_stats": args.record_stats,
             "debug_ratio": args.debug_ratio,
             "info_ratio": args.info_ratio,
             "warning_ratio": args.warning_ratio,
@@ -281,6 +357,14 @@ def parse_args():
                    help="Formatter format.")
     p.add_argument("--propagate", action="store_true",
                    help="Enable propagation to parent loggers.")
+    p.add_argument("--depth", type=int, default=1,
+                   help="Log through a child logger this many levels deep (1 = bench_logger itself).")
+    p.add_argument("--caller-handler", action="store_true",
+                   help="Also attach a %%(lineno)d handler to an unrelated logger.")
+    p.add_argument("--startup-loggers", type=int, default=0,
+                   help="Instead of logging, time configuring this many loggers (e.g. 10000).")
+    p.add_argument("--record-stats", action="store_true",
+                   help="Also report CPU time and allocated bytes per LogRecord.")
     p.add_argument("--debug-ratio", type=float, default=0.7)
     p.add_argument("--info-ratio", type=float, default=0.2)
     p.add_argument("--warning-ratio", type=float, default=0.08)
@@ -314,6 +398,10 @@ def main():
 
     # Simple one-line summary
     print(f"logging: Mean +- std dev: {mean:.3f} s +- {stdev:.3f} s")
+    if "records" in result:
+        records = result["records"]
+        print(f"records: {records['ns_per_record']:.0f} ns, "
+              f"{records['bytes_per_record']:.0f} B per record")
 
     # Optional JSON export if --out was given
     if args.out:
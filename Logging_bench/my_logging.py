@@ -5,18 +5,31 @@ Key ideas:
 - Keep output identical to stdlib logging if the format string is the same.
 - Compute expensive fields (caller/process/thread) only when the active format actually needs them.
 - Cache PID (os.getpid()) once: identical value, fewer syscalls.
-- Do NOT change Formatter.format, propagate, or default handlers.
+- Records are slotted and lazy: derived fields are computed on first access.
+- Each format string is compiled once into a function building the same text.
+- Do NOT change Formatter.format, propagate, or default handlers (the style
+  classes' format() runs the compiled function instead).
 
 Usage:
 - Import this module early (before configuring logging) OR call refresh_logging_needs()
   after you attach handlers/formatters so the detection can see your active formats.
+- Handler, formatter and filter changes made through the logging API are tracked
+  incrementally; call refresh_logging_needs() after changing a Formatter object in
+  place (e.g. its _fmt) or editing a filters list directly.
 """
 
 import logging as _orig
 from logging import *  # re-export stdlib logging API
+import functools
 import os
 import re
+import string as _string
+import sys
 import threading
+from _thread import get_ident as _get_ident
+from collections import namedtuple
+from collections.abc import Mapping, MutableMapping
+from time import time as _time, time_ns as _time_ns
 
 # --- Global flags describing what the current formats require ---
 _NEEDS_CALLER = False
@@ -27,25 +40,89 @@ _NEEDS_RELATIVE_TIME = False
 _NEEDS_EXCEPTION = False
 _LOCK = threading.Lock()
 
-# Handler chain cache for optimization
+# Handler chain cache for optimization: logger -> (generation, chain, needs).
+# Any change to handlers, levels, formatters, filters, propagate or parents
+# bumps the generation.
 _HANDLER_CACHE = {}
 _HANDLER_CACHE_LOCK = threading.Lock()
-
-def _parse_needs_from_format(fmt: str):
+_HANDLER_GENERATION = 0
+
+# Which record fields a set of destinations will format
+_Needs = namedtuple("_Needs", "caller process thread asctime relative_time exception")
+_NO_NEEDS = _Needs(False, False, False, False, False, False)
+_ALL_NEEDS = _Needs(True, True, True, True, True, True)
+
+_CALLER_FIELDS = frozenset(("lineno", "filename", "funcName", "pathname", "module"))
+_PROCESS_FIELDS = frozenset(("process", "processName"))
+_THREAD_FIELDS = frozenset(("thread", "threadName"))
+
+# Handlers that pass the whole record on (to a queue, socket, buffer or web
+# server) instead of formatting it here: their destination may need anything.
+_FORWARDING_HANDLERS = frozenset(("QueueHandler", "SocketHandler",
+                                  "BufferingHandler", "HTTPHandler"))
+
+def _format_fields(fmt: str, style: str = "%"):
+    """Names of the record attributes a format string refers to."""
+    if style == "{":
+        return {field.split(".", 1)[0].split("[", 1)[0]
+                for _, field, _, _ in _string.Formatter().parse(fmt) if field}
+    if style == "$":
+        return {a or b for a, b in re.findall(r"\$(?:(\w+)|\{(\w+)\})", fmt)}
+    return set(re.findall(r"%\((\w+)\)", fmt))
+
+@functools.lru_cache(maxsize=256)
+def _parse_needs_from_format(fmt: str, style: str = "%"):
     """Detect whether the format requires caller, process, thread, time, or exception fields."""
-    needs_caller = bool(re.search(r"%\((lineno|filename|funcName|pathname|module)\)", fmt))
-    needs_process = bool(re.search(r"%\((process|processName)\)", fmt))
-    needs_thread = bool(re.search(r"%\((thread|threadName)\)", fmt))
-    needs_asctime = bool(re.search(r"%\(asctime\)", fmt))
-    needs_relative_time = bool(re.search(r"%\(relativeCreated\)", fmt))
-    needs_exception = bool(re.search(r"%\(exc_text\)", fmt))
-    return needs_caller, needs_process, needs_thread, needs_asctime, needs_relative_time, needs_exception
-
-def _collect_needs_from_all_handlers():
-    """Scan root + known loggers to aggregate which fields are actually needed."""
-    nc = np = nt = na = nr = ne = False
-    root = _orig.getLogger()
-    loggers = [root]
+    fields = _format_fields(fmt, style)
+    return _Needs(caller=not fields.isdisjoint(_CALLER_FIELDS),
+                  process=not fields.isdisjoint(_PROCESS_FIELDS),
+                  thread=not fields.isdisjoint(_THREAD_FIELDS),
+                  asctime="asctime" in fields,
+                  relative_time="relativeCreated" in fields,
+                  exception="exc_text" in fields)
+
+def _merge_needs(a, b):
+    return _Needs(*[x or y for x, y in zip(a, b)])
+
+def _formatter_needs(fmt_obj):
+    """Needs of one formatter; a custom format() may read any field."""
+    if type(fmt_obj).format is not _orig.Formatter.format:
+        return _ALL_NEEDS
+    for style, (style_cls, _) in _orig._STYLES.items():
+        if type(fmt_obj._style) is style_cls:
+            return _parse_needs_from_format(fmt_obj._fmt, style)
+    return _ALL_NEEDS
+
+@functools.lru_cache(maxsize=256)
+def _custom_emit(handler_cls):
+    """Whether emit(), handle() or format() of a handler class is code from
+    outside logging / logging.handlers, and so may read any record field."""
+    for name in ("emit", "handle", "format"):
+        for cls in handler_cls.__mro__:
+            if name in cls.__dict__:
+                module = getattr(cls.__dict__[name], "__module__", cls.__module__)
+                if module not in ("logging", "logging.handlers"):
+                    return True
+                break
+    return False
+
+def _handler_needs(hdlr):
+    """Needs of the records one handler formats."""
+    if hdlr.filters or _custom_emit(type(hdlr)) or any(
+            cls.__name__ in _FORWARDING_HANDLERS
+            and cls.__module__ == "logging.handlers"
+            for cls in type(hdlr).__mro__):
+        return _ALL_NEEDS
+    fmt_obj = hdlr.formatter
+    if fmt_obj is None:
+        fmt_obj = _orig._defaultFormatter
+    if not isinstance(fmt_obj, _orig.Formatter):
+        return _ALL_NEEDS
+    return _formatter_needs(fmt_obj)
+
+def _known_loggers():
+    """Root plus every Logger the manager has created."""
+    loggers = [_orig.getLogger()]
     try:
         # Include other known loggers from the manager if present
         for _, obj in _orig.Logger.manager.loggerDict.items():
@@ -53,34 +130,84 @@ def _collect_needs_from_all_handlers():
                 loggers.append(obj)
     except Exception:
         pass
+    return loggers
 
-    for lg in loggers:
-        for h in getattr(lg, "handlers", []):
-            fmt_obj = getattr(h, "formatter", None)
-            if isinstance(fmt_obj, _orig.Formatter):
-                fmt = getattr(fmt_obj, "_fmt", "%(message)s")
-                c, p, t, a, r, e = _parse_needs_from_format(fmt)
-                nc = nc or c
-                np = np or p
-                nt = nt or t
-                na = na or a
-                nr = nr or r
-                ne = ne or e
-    return nc, np, nt, na, nr, ne
+# Reference counts behind the global flags: for each field, how many
+# (logger, handler) attachments format it. _HANDLER_REFS maps the id of each
+# attached handler to [attachments, needs it is counted with].
+_NEED_COUNTS = [0] * len(_Needs._fields)
+_HANDLER_REFS = {}
 
-def refresh_logging_needs():
-    """Call after configuring handlers/formatters to recompute required fields."""
+def _add_needs(needs, times):
+    for i, needed in enumerate(needs):
+        if needed:
+            _NEED_COUNTS[i] += times
+
+def _publish_needs():
     global _NEEDS_CALLER, _NEEDS_PROCESS, _NEEDS_THREAD, _NEEDS_ASCTIME, _NEEDS_RELATIVE_TIME, _NEEDS_EXCEPTION
+    (_NEEDS_CALLER, _NEEDS_PROCESS, _NEEDS_THREAD,
+     _NEEDS_ASCTIME, _NEEDS_RELATIVE_TIME, _NEEDS_EXCEPTION) = [count > 0 for count in _NEED_COUNTS]
+
+def _attach_handler(hdlr):
+    ref = _HANDLER_REFS.get(id(hdlr))
+    if ref is None:
+        ref = _HANDLER_REFS[id(hdlr)] = [0, _handler_needs(hdlr)]
+    ref[0] += 1
+    _add_needs(ref[1], 1)
+
+def _detach_handler(hdlr):
+    ref = _HANDLER_REFS.get(id(hdlr))
+    if ref is None:
+        return   # attached before the counts were taken
+    ref[0] -= 1
+    _add_needs(ref[1], -1)
+    if not ref[0]:
+        del _HANDLER_REFS[id(hdlr)]
+
+def _count_handlers(removed, added):
+    """Move the need counts for handlers detached from / attached to a logger."""
     with _LOCK:
-        (_NEEDS_CALLER, _NEEDS_PROCESS, _NEEDS_THREAD, 
-         _NEEDS_ASCTIME, _NEEDS_RELATIVE_TIME, _NEEDS_EXCEPTION) = _collect_needs_from_all_handlers()
-    
+        for hdlr in removed:
+            _detach_handler(hdlr)
+        for hdlr in added:
+            _attach_handler(hdlr)
+        _publish_needs()
+
+def _recount_handler(hdlr):
+    """Re-read the needs of an attached handler whose formatter or filters changed."""
+    with _LOCK:
+        ref = _HANDLER_REFS.get(id(hdlr))
+        if ref is None:
+            return
+        needs = _handler_needs(hdlr)
+        if needs != ref[1]:
+            _add_needs(ref[1], -ref[0])
+            _add_needs(needs, ref[0])
+            ref[1] = needs
+            _publish_needs()
+
+def refresh_logging_needs():
+    """Recount the required fields from every logger's handlers.
+
+    Changes made through the logging API keep the counts current; this full
+    scan is only needed after in-place changes the module cannot see.
+    """
+    with _LOCK:
+        _HANDLER_REFS.clear()
+        _NEED_COUNTS[:] = [0] * len(_NEED_COUNTS)
+        for lg in _known_loggers():
+            for h in getattr(lg, "handlers", []):
+                _attach_handler(h)
+        _publish_needs()
+
     # Clear handler cache when needs change
     _clear_handler_cache()
 
 def _clear_handler_cache():
     """Clear handler cache when configuration changes."""
+    global _HANDLER_GENERATION
     with _HANDLER_CACHE_LOCK:
+        _HANDLER_GENERATION += 1
         _HANDLER_CACHE.clear()
 
 def _build_handler_chain(logger):
@@ -97,17 +224,62 @@ def _build_handler_chain(logger):
     
     return handlers
 
+def _chain_needs(logger, chain):
+    """Needs of the records ``logger`` creates: what its chain will format."""
+    if logger.filters:
+        return _ALL_NEEDS   # a logger filter sees (and may use) every field
+    needs = _NO_NEEDS
+    for hdlr, _ in chain:
+        needs = _merge_needs(needs, _handler_needs(hdlr))
+        if needs == _ALL_NEEDS:
+            break
+    return needs
+
+def _get_cached_entry(logger):
+    """Get the cached (generation, chain, needs) of a logger or build it."""
+    # Read the generation before walking: a change made while we build
+    # leaves an entry that is already stale.
+    generation = _HANDLER_GENERATION
+    entry = _HANDLER_CACHE.get(logger)
+    if entry is not None and entry[0] == generation:
+        return entry
+
+    handlers = _build_handler_chain(logger)
+    entry = (generation, handlers, _chain_needs(logger, handlers))
+    with _HANDLER_CACHE_LOCK:
+        _HANDLER_CACHE[logger] = entry
+    return entry
+
 def _get_cached_handlers(logger):
     """Get cached handler chain or build it."""
-    logger_name = logger.name
-    
-    with _HANDLER_CACHE_LOCK:
-        if logger_name in _HANDLER_CACHE:
-            return _HANDLER_CACHE[logger_name]
-        
-        handlers = _build_handler_chain(logger)
-        _HANDLER_CACHE[logger_name] = handlers
-        return handlers
+    return _get_cached_entry(logger)[1]
+
+def _get_logger_needs(logger):
+    """Fields the destinations of ``logger``'s records will format."""
+    entry = _get_cached_entry(logger)
+    if not entry[1]:
+        # No handlers: the record goes to lastResort, which may be swapped
+        # at any time.
+        lastResort = _orig.lastResort
+        if logger.filters:
+            return _ALL_NEEDS
+        return _handler_needs(lastResort) if lastResort else _NO_NEEDS
+    return entry[2]
+
+def _get_record_needs(name):
+    """Needs for a record of the logger called ``name``.
+
+    Falls back to the process-wide needs for records that no known logger
+    creates (e.g. made by hand with makeLogRecord).
+    """
+    if name == _orig.root.name:
+        logger = _orig.root
+    else:
+        logger = _orig.Logger.manager.loggerDict.get(name)
+        if not isinstance(logger, _orig.Logger):
+            return _Needs(_NEEDS_CALLER, _NEEDS_PROCESS, _NEEDS_THREAD,
+                          _NEEDS_ASCTIME, _NEEDS_RELATIVE_TIME, _NEEDS_EXCEPTION)
+    return _get_logger_needs(logger)
 
 # Initial detection (in case handlers already exist)
 refresh_logging_needs()
@@ -117,6 +289,243 @@ refresh_logging_needs()
 # Cache PID once. Value is identical; we just avoid repeated syscalls.
 _CACHED_PID = os.getpid()
 
+def _refresh_cached_pid():
+    # A forked child (multiprocessing's default start method on Linux
+    # before 3.14) must log its own PID, not the parent's.
+    global _CACHED_PID
+    _CACHED_PID = os.getpid()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_refresh_cached_pid)
+
+# --- Lazy LogRecord: store the raw inputs, derive the rest on first access ---
+
+# LogRecord.__init__ is reproduced for these versions only; on the others
+# the factory keeps the stdlib record.
+_LAZY_RECORD = (3, 11) <= sys.version_info[:2] <= (3, 13)
+# 3.12 added taskName; 3.13 takes the time with time_ns() and keeps
+# logging._startTime in nanoseconds.
+_TASK_NAME = sys.version_info >= (3, 12)
+_NS_TIME = sys.version_info >= (3, 13)
+
+# LogRecord attributes in the order LogRecord.__init__ sets them. The two
+# Formatter.format adds (message, asctime) are kept in the instance dict,
+# after any extra= attribute set before them, as in a plain LogRecord.
+_RECORD_FIELDS = ("name", "msg", "args", "levelname", "levelno", "pathname",
+                  "filename", "module", "exc_info", "exc_text", "stack_info",
+                  "lineno", "funcName", "created", "msecs", "relativeCreated",
+                  "thread", "threadName", "processName", "process") + (
+                  ("taskName",) if _TASK_NAME else ())
+_RECORD_FIELD_SET = frozenset(_RECORD_FIELDS)
+_RECORD_ATTRS = _RECORD_FIELD_SET | {"message", "asctime"}
+
+def _split_pathname(pathname):
+    try:
+        filename = os.path.basename(pathname)
+        return filename, os.path.splitext(filename)[0]
+    except (TypeError, ValueError, AttributeError):
+        return pathname, "Unknown module"
+
+def _thread_name(rec):
+    # Looked up from the creating thread's ident. Records whose destinations
+    # format threadName get it at creation instead (see the factory).
+    thread = threading._active.get(rec.thread)
+    return (thread or threading.current_thread()).name
+
+def _process_name(rec=None):
+    name = "MainProcess"
+    mp = sys.modules.get("multiprocessing")
+    if mp is not None:
+        try:
+            name = mp.current_process().name
+        except Exception:
+            pass
+    return name
+
+def _task_name():
+    # LogRecord.__init__ of 3.12+: the name of the running asyncio task.
+    if _orig.logAsyncioTasks:
+        asyncio = sys.modules.get("asyncio")
+        if asyncio:
+            try:
+                return asyncio.current_task().get_name()
+            except Exception:
+                pass
+    return None
+
+if _NS_TIME:
+    def _msecs(rec):
+        ct = rec._ct   # nanoseconds
+        msecs = (ct % 1_000_000_000) // 1_000_000 + 0.0
+        if msecs == 999.0 and int(ct / 1e9) != ct // 1_000_000_000:
+            msecs = 0.0   # ns -> sec conversion rounded up
+        return msecs
+
+    def _relative_created(rec):
+        return (rec._ct - _orig._startTime) / 1e6
+else:
+    def _msecs(rec):
+        return int((rec._ct - int(rec._ct)) * 1000) + 0.0  # see gh-89047
+
+    def _relative_created(rec):
+        return (rec._ct - _orig._startTime) * 1000
+
+# Derived attributes: name -> function of the record's raw inputs, with the
+# LogRecord.__init__ formulas of the running Python version.
+_LAZY_FIELDS = {
+    "levelname": lambda rec: _orig.getLevelName(rec._level),
+    "filename": lambda rec: _split_pathname(rec._pathname)[0],
+    "module": lambda rec: _split_pathname(rec._pathname)[1],
+    "msecs": _msecs,
+    "relativeCreated": _relative_created,
+    "threadName": _thread_name,
+    "processName": _process_name,
+}
+
+
+class _RecordDict(MutableMapping):
+    """``record.__dict__`` of a _LazyLogRecord: a live view of its attributes.
+
+    Reads go through the attributes (computing lazy ones), writes set them,
+    so Formatter styles, makeRecord(extra=...) and makeLogRecord work as on
+    a plain LogRecord.
+    """
+    __slots__ = ("_record", "_extra")
+
+    def __init__(self, record):
+        self._record = record
+        self._extra = _instance_dict(record)   # set after __init__, in order
+
+    def __getitem__(self, key):
+        if key in _RECORD_FIELD_SET:
+            try:
+                return getattr(self._record, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _RECORD_FIELD_SET:
+            setattr(self._record, key, value)
+        else:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _RECORD_FIELD_SET:
+            try:
+                delattr(self._record, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        if key in _RECORD_FIELD_SET:
+            return hasattr(self._record, key)
+        return key in self._extra
+
+    def __iter__(self):
+        record = self._record
+        for name in _RECORD_FIELDS:
+            if hasattr(record, name):
+                yield name
+        yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __or__(self, other):
+        merged = dict(self)
+        merged.update(other)
+        return merged
+
+    def __ror__(self, other):
+        # Formatter defaults: ``defaults | record.__dict__``
+        merged = dict(other)
+        merged.update(self)
+        return merged
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _LogRecordSlots:
+    """Storage of _LazyLogRecord: a slot per LogRecord attribute plus the raw
+    inputs the derived ones are computed from. Attributes outside that set
+    (``extra=``, filters, the formatter's message and asctime) go to the
+    instance dict, only allocated when one is stored."""
+    __slots__ = _RECORD_FIELDS + ("_ct", "_level", "_pathname",
+                                  "__dict__", "__weakref__")
+
+_instance_dict = _LogRecordSlots.__dict__["__dict__"].__get__
+
+
+class _LazyLogRecord(_LogRecordSlots):
+    """LogRecord that stores only its raw inputs.
+
+    levelname, filename, module, msecs, relativeCreated, threadName and
+    processName are computed on first access (from the values captured at
+    creation) and then kept in their slot; assigning any attribute works as
+    on a plain LogRecord.
+    """
+    __slots__ = ()
+
+    def __init__(self, name, level, pathname, lineno,
+                 msg, args, exc_info, func=None, sinfo=None, **kwargs):
+        if _NS_TIME:
+            self._ct = ct = _time_ns()
+            self.created = ct / 1e9
+        else:
+            self._ct = self.created = _time()
+        self.name = name
+        self.msg = msg
+        if (args and len(args) == 1 and isinstance(args[0], Mapping)
+            and args[0]):
+            args = args[0]
+        self.args = args
+        self._level = self.levelno = level
+        self._pathname = self.pathname = pathname
+        self.exc_info = exc_info
+        self.exc_text = None      # used to cache the traceback text
+        self.stack_info = sinfo
+        self.lineno = lineno
+        self.funcName = func
+        if _orig.logThreads:
+            self.thread = _get_ident()
+        else:
+            self.thread = self.threadName = None
+        if not _orig.logMultiprocessing:
+            self.processName = None
+        self.process = _CACHED_PID if _orig.logProcesses else None
+        if _TASK_NAME:
+            # The running task can't be found later: taken now, as stdlib does
+            self.taskName = _task_name()
+
+    def __getattr__(self, name):
+        # Only reached for empty slots and unknown names
+        compute = _LAZY_FIELDS.get(name)
+        if compute is None:
+            raise AttributeError("'LogRecord' object has no attribute %r" % name)
+        value = compute(self)
+        setattr(self, name, value)
+        return value
+
+    # isinstance(record, logging.LogRecord) holds, as for the stdlib records.
+    __class__ = property(lambda self: _orig.LogRecord)
+    __dict__ = property(_RecordDict)
+
+    def __reduce__(self):
+        # Copies (QueueHandler.prepare) and pickles (multiprocessing queues)
+        # go through makeLogRecord with every attribute materialized.
+        return _orig.makeLogRecord, (dict(self.__dict__),)
+
+    getMessage = _orig.LogRecord.getMessage
+    __repr__ = __str__ = _orig.LogRecord.__repr__
+
+
 # Wrap the current LogRecord factory with an adaptive version
 _base_factory = _orig.getLogRecordFactory()
 
@@ -125,17 +534,29 @@ def _adaptive_logrecord_factory(*args, **kwargs):
     Create a LogRecord as usual, but only populate expensive fields
     if the active formats actually use them.
     """
+    if _base_factory is _orig.LogRecord and _LAZY_RECORD:
+        rec = _LazyLogRecord(*args, **kwargs)
+        needs = _get_record_needs(rec.name)
+        # Thread and process names may change after the call: take them now
+        # when a destination uses them.
+        if needs.thread and rec.thread is not None:
+            rec.threadName = threading.current_thread().name
+        if needs.process and _orig.logMultiprocessing:
+            rec.processName = _process_name()
+        return rec
+
     rec = _base_factory(*args, **kwargs)
+    needs = _get_record_needs(rec.name)
 
     # Thread info: only useful if the format requests it.
     # Leaving None when not used has no effect on output since fields aren't referenced.
-    if not _NEEDS_THREAD:
+    if not needs.thread:
         # Keep fields as-is or None; no extra work.
         rec.thread = getattr(rec, "thread", None)
         rec.threadName = getattr(rec, "threadName", None)
 
     # Process info: if needed, use cached PID; otherwise avoid extra names/fields work.
-    if _NEEDS_PROCESS:
+    if needs.process:
         rec.process = _CACHED_PID
     else:
         rec.process = getattr(rec, "process", _CACHED_PID)
@@ -151,36 +572,194 @@ except Exception:
 # Wrap Logger.findCaller so we only walk the stack if the format requires caller info.
 _real_findCaller = _orig.Logger.findCaller
 
-def _findCaller_if_needed(self, *a, **k):
-    if not _NEEDS_CALLER:
-        # Returning an empty caller tuple is safe when caller fields are not used in the format.
+def _findCaller_if_needed(self, stack_info=False, stacklevel=1):
+    if not stack_info and not _get_logger_needs(self).caller:
+        # Returning an empty caller tuple is safe when caller fields are not
+        # used by the formats this logger's records reach.
         return ("", 0, "", None)
-    return _real_findCaller(self, *a, **k)
+    # One more level: this wrapper's own frame is not a logging-internal one.
+    return _real_findCaller(self, stack_info, stacklevel + 1)
 
 try:
     _orig.Logger.findCaller = _findCaller_if_needed  # type: ignore[attr-defined]
 except Exception:
     pass
 
-# --- Auto-refresh hooks: keep detection in sync when the app reconfigures logging ---
+# --- Cached handler chains: callHandlers without walking the logger tree ---
+
+class _HandlerList(list):
+    """Logger.handlers list that invalidates the handler chains when mutated.
+
+    While it is some logger's handlers list (``attached``), mutations also
+    move the need counts of the handlers that leave or join it.
+    """
+    __slots__ = ("attached",)
+
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self.attached = False
+
+    def __reduce__(self):
+        # Copies and pickles are plain lists, never attached to a logger.
+        return list, (list(self),)
+
+def _attached_list(handlers):
+    lst = _HandlerList(handlers)
+    lst.attached = True
+    return lst
+
+def _invalidating(name):
+    method = getattr(list, name)
+    def mutate(self, *args):
+        if not self.attached:
+            return method(self, *args)
+        before = list(self)
+        result = method(self, *args)
+        _count_handlers(before, self)
+        _clear_handler_cache()
+        return result
+    mutate.__name__ = name
+    return mutate
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort",
+              "reverse", "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(_HandlerList, _name, _invalidating(_name))
+del _name
+
+
+class _ChainAttribute:
+    """Data descriptor for an attribute the handler chains depend on.
+
+    The value stays in the instance __dict__ under its own name, so objects
+    created before this module was imported keep their value; every
+    assignment invalidates the cached chains.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+        _clear_handler_cache()
+
+    def __delete__(self, obj):
+        try:
+            del obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        _clear_handler_cache()
+
+
+class _HandlersAttribute(_ChainAttribute):
+    """Logger.handlers: kept as an attached _HandlerList.
+
+    Assigning a new list moves the need counts from the old contents to the
+    new ones.
+    """
+
+    def __init__(self):
+        super().__init__("handlers")
+
+    def __get__(self, obj, objtype=None):
+        value = super().__get__(obj, objtype)
+        if type(value) is list:
+            # A handlers list made before the import: swap in a tracking one.
+            # Its handlers were counted by the initial refresh.
+            value = obj.__dict__["handlers"] = _attached_list(value)
+        return value
+
+    def __set__(self, obj, value):
+        old = obj.__dict__.get("handlers")
+        new = obj.__dict__["handlers"] = _attached_list(value)
+        self._detach(old, new)
+
+    def __delete__(self, obj):
+        old = obj.__dict__.get("handlers")
+        super().__delete__(obj)
+        self._detach(old, ())
+
+    @staticmethod
+    def _detach(old, new):
+        if type(old) is _HandlerList and old.attached:
+            old.attached = False
+        else:
+            old = ()
+        _count_handlers(old, new)
+        _clear_handler_cache()
+
+
+class _FormatterAttribute(_ChainAttribute):
+    """Handler.formatter: a new formatter may change what the handler needs."""
+
+    def __init__(self):
+        super().__init__("formatter")
+
+    def __set__(self, obj, value):
+        super().__set__(obj, value)
+        _recount_handler(obj)
+
+
+def _callHandlers_cached(self, record):
+    """Logger.callHandlers over the cached (handler, level) chain.
+
+    Same semantics as the stdlib walk: every handler up the propagate chain
+    whose level passes handles the record, and lastResort (or the one-time
+    "No handlers" warning) applies only when the chain has no handlers.
+    """
+    chain = _get_cached_entry(self)[1]
+    if chain:
+        levelno = record.levelno
+        for hdlr, level in chain:
+            if levelno >= level:
+                hdlr.handle(record)
+    else:
+        lastResort = _orig.lastResort
+        if lastResort:
+            if record.levelno >= lastResort.level:
+                lastResort.handle(record)
+        elif _orig.raiseExceptions and not self.manager.emittedNoHandlerWarning:
+            sys.stderr.write("No handlers could be found for logger"
+                             " \"%s\"\n" % self.name)
+            self.manager.emittedNoHandlerWarning = True
+
+try:
+    _orig.Logger.handlers = _HandlersAttribute()
+    _orig.Logger.propagate = _ChainAttribute("propagate")
+    _orig.Logger.parent = _ChainAttribute("parent")
+    _orig.Handler.level = _ChainAttribute("level")
+    _orig.Handler.formatter = _FormatterAttribute()
+    _orig.Logger.callHandlers = _callHandlers_cached  # type: ignore[attr-defined]
+except Exception:
+    pass
+
 
-_OrigHandler_setFormatter = _orig.Handler.setFormatter
-def _setFormatter_and_refresh(self, fmt):
-    _OrigHandler_setFormatter(self, fmt)
-    refresh_logging_needs()
-_orig.Handler.setFormatter = _setFormatter_and_refresh  # type: ignore
+# --- Filter hooks: keep detection in sync when the app adds or drops filters ---
+# (handlers lists and formatters are tracked by the descriptors above)
 
-_OrigLogger_addHandler = _orig.Logger.addHandler
-def _addHandler_and_refresh(self, h):
-    _OrigLogger_addHandler(self, h)
-    refresh_logging_needs()
-_orig.Logger.addHandler = _addHandler_and_refresh  # type: ignore
+# Filters make a chain need every field.
+_OrigFilterer_addFilter = _orig.Filterer.addFilter
+def _addFilter_and_refresh(self, filter):
+    _OrigFilterer_addFilter(self, filter)
+    if isinstance(self, _orig.Handler):
+        _recount_handler(self)
+    _clear_handler_cache()
+_orig.Filterer.addFilter = _addFilter_and_refresh  # type: ignore
 
-_OrigLogger_removeHandler = _orig.Logger.removeHandler
-def _removeHandler_and_refresh(self, h):
-    _OrigLogger_removeHandler(self, h)
-    refresh_logging_needs()
-_orig.Logger.removeHandler = _removeHandler_and_refresh  # type: ignore
+_OrigFilterer_removeFilter = _orig.Filterer.removeFilter
+def _removeFilter_and_refresh(self, filter):
+    _OrigFilterer_removeFilter(self, filter)
+    if isinstance(self, _orig.Handler):
+        _recount_handler(self)
+    _clear_handler_cache()
+_orig.Filterer.removeFilter = _removeFilter_and_refresh  # type: ignore
 
 
 # --- Message formatting optimization ---
@@ -215,15 +794,174 @@ def _optimize_message_formatting():
         return _orig_getMessage(self)
     
     _orig.LogRecord.getMessage = _fast_getMessage
+    _LazyLogRecord.getMessage = _fast_getMessage
 
 
 # Apply optimizations
 _optimize_message_formatting()
 
 
+# --- Compiled formatters: one specialized function per format string ---
+
+# A %-style field this module compiles; any other "%" is left to the stdlib.
+_PERCENT_FIELD = re.compile(r"%\((\w+)\)([#0+ -]*\d*(?:\.\d+)?)([diouxXeEfFgGcrsa])|%%")
+
+def _percent_pieces(fmt):
+    """Literal strings and (name, conversion, spec) fields of a %-style format."""
+    pieces = []
+    pos = 0
+    for m in _PERCENT_FIELD.finditer(fmt):
+        if "%" in fmt[pos:m.start()]:
+            return None
+        pieces.append(fmt[pos:m.start()])
+        name, flags, conversion = m.groups()
+        if name is None:
+            pieces.append("%")
+        elif not flags and conversion in "sra":
+            pieces.append((name, conversion, ""))
+        else:
+            pieces.append((name, "%", "%" + flags + conversion))
+        pos = m.end()
+    if "%" in fmt[pos:]:
+        return None
+    pieces.append(fmt[pos:])
+    return pieces
+
+def _brace_pieces(fmt):
+    """Pieces of a {}-style format whose fields are plain names."""
+    pieces = []
+    try:
+        parsed = list(_string.Formatter().parse(fmt))
+    except ValueError:
+        return None
+    for literal, name, spec, conversion in parsed:
+        pieces.append(literal)
+        if name is None:
+            continue
+        if (not name.isidentifier() or "{" in spec
+                or conversion not in (None, "r", "s", "a")):
+            return None   # attribute/index lookups, nested specs
+        pieces.append((name, conversion, spec))
+    return pieces
+
+def _template_pieces(fmt):
+    """Pieces of a $-style format, as string.Template substitutes it."""
+    pieces = []
+    pos = 0
+    for m in _string.Template.pattern.finditer(fmt):
+        pieces.append(fmt[pos:m.start()])
+        name = m.group("named") or m.group("braced")
+        if name is not None:
+            pieces.append((name, "s", ""))
+        elif m.group("escaped") is not None:
+            pieces.append(_string.Template.delimiter)
+        else:
+            return None   # substitute() raises on invalid placeholders
+        pos = m.end()
+    pieces.append(fmt[pos:])
+    return pieces
+
+def _generate_format(pieces):
+    """Build ``format(record)``: one f-string over the fields the format uses.
+
+    LogRecord attributes are read directly, anything else from
+    ``record.__dict__``; a (name, conversion, spec) field is rendered as
+    ``spec % (value,)`` for conversion "%" and as ``format(value!conversion,
+    spec)`` otherwise.
+    """
+    namespace = {}
+    parts = []
+    uses_dict = False
+    for piece in pieces:
+        if type(piece) is str:
+            parts.append(piece.replace("{", "{{").replace("}", "}}"))
+            continue
+        name, conversion, spec = piece
+        if name in _RECORD_ATTRS:
+            value = "record." + name
+        else:
+            key = "_k%d" % len(namespace)
+            namespace[key] = name
+            value = "d[%s]" % key
+            uses_dict = True
+        if spec:
+            const = "_c%d" % len(namespace)
+            namespace[const] = spec
+        if conversion == "%":
+            if spec in ("%d", "%i"):
+                # int.__repr__ is %d of an exact int
+                parts.append("{_i(%s) if type(%s) is int else %s %% (%s,)}"
+                             % (value, value, const, value))
+            else:
+                parts.append("{%s %% (%s,)}" % (const, value))
+        else:
+            if conversion:
+                value += "!" + conversion
+            parts.append("{%s:{%s}}" % (value, const) if spec else "{%s}" % value)
+
+    lines = ["def format(record):"]
+    if uses_dict:
+        lines.append("    d = record.__dict__")
+    lines.append("    return f" + repr("".join(parts)))
+    namespace["_i"] = int.__repr__
+    exec("\n".join(lines), namespace)
+    return namespace["format"]
+
+_STYLE_PIECES = {"%": _percent_pieces, "{": _brace_pieces, "$": _template_pieces}
+
+@functools.lru_cache(maxsize=256)
+def _compile_format(fmt: str, style: str):
+    """Specialized ``format(record)`` for a format string, or None when the
+    stdlib style has to handle it."""
+    pieces = _STYLE_PIECES[style](fmt)
+    return None if pieces is None else _generate_format(pieces)
+
+def _compiled_style_format(style_cls, style):
+    """``format`` for a stdlib style class that runs the compiled format.
+
+    Subclasses, formats with defaults and other record classes keep the
+    stdlib path; so do formats the compiler declines.
+    """
+    orig_format = style_cls.format
+    template = style == "$"
+
+    def format(self, record):
+        if (type(self) is style_cls and not self._defaults
+                and (type(record) is _LazyLogRecord or type(record) is _orig.LogRecord)):
+            if not template:
+                fmt = self._fmt
+            elif type(self._tpl) is _string.Template:
+                fmt = self._tpl.template
+            else:
+                return orig_format(self, record)
+            # The compiled function is kept on the style with the format it
+            # was built for
+            try:
+                compiled_fmt, compiled = self._compiled
+            except AttributeError:
+                compiled_fmt = compiled = None
+            if compiled_fmt is not fmt:
+                compiled = _compile_format(fmt, style)
+                self._compiled = (fmt, compiled)
+            if compiled is not None:
+                try:
+                    return compiled(record)
+                except (AttributeError, KeyError):
+                    pass   # a missing field: the stdlib path raises the usual error
+        return orig_format(self, record)
+
+    return format
+
+for _style, (_style_cls, _) in _orig._STYLES.items():
+    _style_cls.format = _compiled_style_format(_style_cls, _style)
+del _style, _style_cls, _
+
+
 # Note:
 # - We do NOT force propagate changes, do NOT set default handlers/formatters,
-#   and do NOT override Formatter.format. Output remains identical to stdlib
-#   when the same format string is used.
+#   and do NOT override Formatter.format or Formatter.formatTime. The stdlib
+#   style classes' format() is replaced: it runs the compiled function of the
+#   format string and falls back to the original one. Output remains identical
+#   to stdlib when the same format string is used.
 # - Message formatting and handler chain caching provide significant performance
 #   improvements while maintaining complete compatibility.
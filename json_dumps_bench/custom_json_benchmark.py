@@ -1,6 +1,14 @@
+import asyncio
+import functools
 import json
 import my_json_dumps as myjson
+import os
 import sys
+import time
+import tracemalloc
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from enum import Enum
 from pathlib import Path
 
 import pyperf
@@ -14,6 +22,51 @@ NESTED_DATA = {'key1': 0, 'key2': SIMPLE[0], 'key3': 'value', 'key4': SIMPLE[0],
                'key5': SIMPLE[0], 'key': '\u0105\u0107\u017c'}
 NESTED = (NESTED_DATA, 1000)
 HUGE = ([NESTED[0]] * 1000, 1)
+# Telemetry-style payload: long runs of ints and floats
+NUMERIC_DATA = {'host': 'node-1',
+                'timestamps': list(range(1700000000, 1700005000)),
+                'values': [i * 0.37 for i in range(5000)],
+                'counters': [i * i for i in range(5000)]}
+NUMERIC = (NUMERIC_DATA, 10)
+
+
+def deep_data(depth):
+    node = {'leaf': True}
+    for level in range(depth):
+        node = {'level': level, 'tags': ['a', 'b'], 'child': node}
+    return node
+
+
+# Container-heavy payloads: one long chain, and many small siblings
+DEEP = (deep_data(150), 500)
+WIDE = ([{'id': i, 'ok': True, 'tags': ['x', i]} for i in range(10000)], 5)
+
+
+# Object graph for --api objects: domain objects instead of dicts
+class Status(Enum):
+    OPEN = 'open'
+    SHIPPED = 'shipped'
+
+
+@dataclass
+class LineItem:
+    sku: str
+    quantity: int
+    price: float
+
+
+@dataclass
+class Order:
+    id: int
+    customer: str
+    status: Status
+    items: list
+    note: str = None
+
+
+ORDERS = ([Order(i, f'customer-{i}', Status.OPEN if i % 2 else Status.SHIPPED,
+                 [LineItem(f'sku-{j}', j + 1, (j + 1) * 2.5) for j in range(3)])
+           for i in range(1000)], 1)
 
 
 # Add your custom JSON file
@@ -47,33 +100,315 @@ def load_custom_json():
 CUSTOM_DATA, CUSTOM_ITERATIONS = load_custom_json()
 if CUSTOM_DATA is not None:
     CUSTOM = (CUSTOM_DATA, CUSTOM_ITERATIONS)
-    CASES = ['EMPTY', 'SIMPLE', 'NESTED', 'HUGE', 'CUSTOM']
+    CASES = ['EMPTY', 'SIMPLE', 'NESTED', 'HUGE', 'NUMERIC', 'CUSTOM']
 else:
-    CASES = ['EMPTY', 'SIMPLE', 'NESTED', 'HUGE']
+    CASES = ['EMPTY', 'SIMPLE', 'NESTED', 'HUGE', 'NUMERIC']
+
+# Only run by default with --container-cases (or named in --cases)
+CONTAINER_CASES = ['DEEP', 'WIDE']
+
+# Keyword option sets passed to every dumps() call (--options)
+OPTION_SETS = {
+    'default': {},
+    'compact': {'separators': (',', ':')},
+    # The only set orjson/ujson reproduce (--impl fast-loose)
+    'compact-utf8': {'separators': (',', ':'), 'ensure_ascii': False},
+    'sorted': {'sort_keys': True},
+    'indent': {'indent': 2},
+}
+
+
+def bench_json_dumps(data, options=None):
+    if options:
+        for obj, count_it in data:
+            for _ in count_it:
+                json.dumps(obj, **options)
+    else:
+        for obj, count_it in data:
+            for _ in count_it:
+                json.dumps(obj)
+
+
+def bench_json_dump(data, buffer_size):
+    """Stream every case to /dev/null with my_json_dumps.dump().
+
+    buffer_size 0 writes every token to a text file (the stdlib behaviour);
+    otherwise UTF-8 is written to a raw file descriptor in buffer_size chunks.
+    """
+    if buffer_size:
+        fd = os.open(os.devnull, os.O_WRONLY)
+        try:
+            for obj, count_it in data:
+                for _ in count_it:
+                    myjson.dump(obj, fd, buffer_size=buffer_size)
+        finally:
+            os.close(fd)
+    else:
+        with open(os.devnull, "w", encoding="utf-8") as fp:
+            for obj, count_it in data:
+                for _ in count_it:
+                    myjson.dump(obj, fp)
+
+
+def access(doc, ratio):
+    """Read about ratio of the top-level values and the members of each."""
+    step = max(1, round(1 / ratio))
+    if isinstance(doc, Mapping):
+        values = [doc[key] for key in list(doc)[::step]]
+    elif isinstance(doc, Sequence):
+        values = [doc[i] for i in range(0, len(doc), step)]
+    else:
+        return
+    for value in values:
+        if isinstance(value, Mapping):
+            for key in value:
+                value[key]
+
+
+def bench_json_loads(texts, loads, ratio):
+    for text, count_it in texts:
+        for _ in count_it:
+            access(loads(text), ratio)
+
+
+# Decode option sets compared by --api loads
+DECODE_OPTION_SETS = {
+    'plain': {},
+    'intern_keys': {'intern_keys': True},
+    'intern_values': {'intern_values': True},
+    'records': {'records': True},
+    'records_interned': {'records': True, 'intern_values': True},
+}
+
+
+def bench_json_loads_options(texts, options):
+    for text, count_it in texts:
+        for _ in count_it:
+            myjson.loads(text, **options)
+
+
+def count_objects(value):
+    """Number of JSON objects in a decoded document."""
+    if isinstance(value, dict):
+        return 1 + sum(count_objects(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(count_objects(v) for v in value)
+    return 0
+
 
+def bytes_per_object(texts, options):
+    """Memory held by the decoded documents, per JSON object."""
+    objects = sum(count_objects(json.loads(text)) for text, _ in texts)
+    tracemalloc.start()
+    try:
+        decoded = [myjson.loads(text, **options) for text, _ in texts]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del decoded
+    return size / max(objects, 1)
 
-def bench_json_dumps(data):
+
+def pivot(rows):
+    """Columns of an array of records, the way it is done by hand after loads()."""
+    keys = {}
+    for row in rows:
+        keys.update(dict.fromkeys(row))
+    return {key: [row.get(key) for row in rows] for key in keys}
+
+
+def bench_json_columns(texts, columns):
+    for text, count_it in texts:
+        for _ in count_it:
+            columns(text)
+
+
+def peak_memory(texts, columns):
+    """Peak traced memory while building the columns of every text."""
+    tracemalloc.start()
+    try:
+        for text, _ in texts:
+            columns(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def leaf_slots(obj):
+    """(container, key) of every value inside obj that is not a container."""
+    slots = []
+    for key, value in (obj.items() if isinstance(obj, dict) else enumerate(obj)):
+        if isinstance(value, (dict, list)):
+            slots.extend(leaf_slots(value))
+        elif not isinstance(value, tuple):
+            slots.append((obj, key))
+    return slots
+
+
+def bench_json_incremental(states, changes, incremental):
+    """Change `changes` leaves of each tracked document, then encode it."""
+    for state, slots, count_it in states:
+        for i in count_it:
+            if slots:
+                for j in range(changes):
+                    container, key = slots[(i * changes + j) % len(slots)]
+                    container[key] = i
+            if incremental:
+                myjson.dumps(state, incremental=True)
+            else:
+                json.dumps(state)
+
+
+def vars_or_value(obj):
+    """The usual default= for domain objects: vars(), and the value of enums."""
+    if isinstance(obj, Enum):
+        return obj.value
+    return vars(obj)
+
+
+def bench_json_objects(graph, count_it, options, objects):
+    if objects:
+        for _ in count_it:
+            myjson.dumps(graph, objects=True, **options)
+    else:
+        for _ in count_it:
+            json.dumps(graph, default=vars_or_value, **options)
+
+
+class MemoryWriter:
+    """In-memory stand-in for asyncio.StreamWriter: write() and drain()."""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    async def drain(self):
+        pass
+
+
+async def heartbeat_lag(send, data):
+    """Worst delay of a 1 ms ticker while send() writes every case."""
+    lags = []
+    done = False
+
+    async def tick():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0.005)
     for obj, count_it in data:
         for _ in count_it:
-            json.dumps(obj)
+            await send(obj, MemoryWriter())
+    done = True
+    await ticker
+    return max(lags)
+
+
+async def send_whole(obj, writer):
+    writer.write(json.dumps(obj).encode("utf-8"))
+    await writer.drain()
+
+
+async def send_streamed(obj, writer):
+    await myjson.dump_async(obj, writer)
+
+
+def bench_json_dump_async(data, send):
+    async def run():
+        for obj, count_it in data:
+            for _ in count_it:
+                await send(obj, MemoryWriter())
+    asyncio.run(run())
+
+
+def payload_bytes(data):
+    """UTF-8 size of the JSON written by one loop over data."""
+    return sum(len(myjson.dumps(obj).encode("utf-8")) * len(count_it)
+               for obj, count_it in data)
 
 
 def add_cmdline_args(cmd, args):
     if args.cases:
         cmd.extend(("--cases", args.cases))
+    if args.container_cases:
+        cmd.append("--container-cases")
     if args.impl:
         cmd.extend(("--impl", args.impl))
+    if args.api:
+        cmd.extend(("--api", args.api))
+    if args.options:
+        cmd.extend(("--options", args.options))
+    cmd.extend(("--dump-buffer", str(args.dump_buffer)))
+    cmd.extend(("--workers", args.workers))
+    cmd.extend(("--access-ratios", args.access_ratios))
+    cmd.extend(("--changes", str(args.changes)))
 
 
 def main():
     runner = pyperf.Runner(add_cmdline_args=add_cmdline_args)
     runner.argparser.add_argument("--cases",
-                                  help="Comma separated list of cases. Available cases: %s. By default, run all cases."
-                                       % ', '.join(CASES))
+                                  help="Comma separated list of cases. Available cases: %s. By default, run all cases "
+                                       "except %s (see --container-cases)."
+                                       % (', '.join(CASES + CONTAINER_CASES), ', '.join(CONTAINER_CASES)))
+    runner.argparser.add_argument("--container-cases", action="store_true",
+                                  help="Also run the container-heavy cases (%s) when --cases is not given"
+                                       % ', '.join(CONTAINER_CASES))
     runner.argparser.add_argument("--impl",
-                                  choices=["baseline", "optimized", "fast"],
+                                  choices=["baseline", "optimized", "fast", "fast-loose", "pooled", "memoized",
+                                           "specialized", "acyclic", "parallel"],
                                   default="baseline",
-                                  help="Which implementation of json.dumps to use: baseline (stdlib), optimized, or fast")
+                                  help="Which implementation of json.dumps to use: baseline (stdlib), optimized, "
+                                       "fast (my_json_dumps.dumps_fast, strict: only backends exact for every input, "
+                                       "currently just my_json_dumps.dumps), "
+                                       "fast-loose (dumps_fast(strict=False): orjson/ujson/optimized where the "
+                                       "options allow, see my_json_dumps.fast_backends()), "
+                                       "pooled (my_json_dumps.dumps, encoders reused per option set, see --options), "
+                                       "memoized (my_json_dumps.dumps with per-call subtree memoization) "
+                                       "specialized (my_json_dumps.dumps with shape-specialized dict serializers), "
+                                       "acyclic (my_json_dumps.dumps(acyclic=True), no circular-reference bookkeeping) "
+                                       "or parallel (my_json_dumps.dumps(parallel=True), see --workers)")
+    runner.argparser.add_argument("--options",
+                                  choices=sorted(OPTION_SETS),
+                                  default="default",
+                                  help="Option set passed to every dumps() call: default, compact "
+                                       "(separators=(',', ':')), compact-utf8 (compact, ensure_ascii=False), "
+                                       "sorted (sort_keys=True) or indent (indent=2)")
+    runner.argparser.add_argument("--workers", default=str(os.cpu_count() or 1),
+                                  help="Comma separated worker counts for --impl parallel; one benchmark "
+                                       "is run per count and the speedup over the first is printed")
+    runner.argparser.add_argument("--api",
+                                  choices=["dumps", "dump", "loads", "loads_lazy", "loads_columnar",
+                                           "incremental", "objects", "dump_async"],
+                                  default="dumps",
+                                  help="dumps: time json.dumps() with --impl; "
+                                       "dump: time streaming my_json_dumps.dump() to /dev/null and report throughput; "
+                                       "loads: time my_json_dumps.loads() with each decode option set "
+                                       "(interning, compact records) and report memory per object; "
+                                       "loads_lazy: time json.loads() against my_json_dumps.loads_lazy() "
+                                       "followed by reading a fraction of the document (see --access-ratios); "
+                                       "loads_columnar: time json.loads() plus a pivot into columns against "
+                                       "my_json_dumps.loads_columnar() on the array cases and report peak memory; "
+                                       "incremental: change a few leaves of a tracked copy of each case, then "
+                                       "time json.dumps() against my_json_dumps.dumps(incremental=True); "
+                                       "objects: time json.dumps(default=vars) against "
+                                       "my_json_dumps.dumps(objects=True) on a graph of dataclasses "
+                                       "(ignores --cases, honours --options); "
+                                       "dump_async: time writing json.dumps() in one piece against "
+                                       "my_json_dumps.dump_async() to an in-memory writer and report the "
+                                       "worst event-loop delay seen by a 1 ms ticker")
+    runner.argparser.add_argument("--access-ratios", default="0.01,0.1,1",
+                                  help="Comma separated fractions of the top-level values read "
+                                       "after decoding, for --api loads_lazy")
+    runner.argparser.add_argument("--changes", type=int, default=5,
+                                  help="Leaves changed before each encode, for --api incremental")
+    runner.argparser.add_argument("--dump-buffer", type=int, default=64 * 1024,
+                                  help="Write buffer size in bytes for --api dump "
+                                       "(0 = one write per token to a text file, like stdlib json.dump)")
     runner.metadata['description'] = "Benchmark json.dumps() with custom data"
 
     args = runner.parse_args()
@@ -83,6 +418,16 @@ def main():
         json.dumps = myjson.dumps_optimized
     elif args.impl == "fast":
         json.dumps = myjson.dumps_fast
+    elif args.impl == "fast-loose":
+        json.dumps = functools.partial(myjson.dumps_fast, strict=False)
+    elif args.impl == "pooled":
+        json.dumps = myjson.dumps
+    elif args.impl == "memoized":
+        json.dumps = functools.partial(myjson.dumps, memoize=True)
+    elif args.impl == "specialized":
+        json.dumps = functools.partial(myjson.dumps, specialize=True)
+    elif args.impl == "acyclic":
+        json.dumps = functools.partial(myjson.dumps, acyclic=True)
     else:  # baseline
         import importlib
         std_json = importlib.import_module("json")
@@ -100,13 +445,102 @@ def main():
             sys.exit(1)
     else:
         cases = CASES
+        if args.container_cases:
+            cases = cases + CONTAINER_CASES
+
+    options = OPTION_SETS[args.options]
 
     data = []
     for case in cases:
         obj, count = globals()[case]
         data.append((obj, range(count)))
 
-    runner.bench_func('json_dumps', bench_json_dumps, data)
+    if args.api == "loads":
+        texts = [(json.dumps(obj), count_it) for obj, count_it in data]
+        for name, options in DECODE_OPTION_SETS.items():
+            bench = runner.bench_func(f'json_loads_{name}', bench_json_loads_options,
+                                      texts, options)
+            if bench is not None:
+                print(f"{name}: {bench.mean() * 1e3:.2f} ms, "
+                      f"{bytes_per_object(texts, options):.0f} bytes per object")
+    elif args.api == "loads_lazy":
+        texts = [(json.dumps(obj), count_it) for obj, count_it in data]
+        for ratio in [float(r) for r in args.access_ratios.split(",") if r.strip()]:
+            full = runner.bench_func(f'json_loads_full_{ratio:g}', bench_json_loads,
+                                     texts, json.loads, ratio)
+            lazy = runner.bench_func(f'json_loads_lazy_{ratio:g}', bench_json_loads,
+                                     texts, myjson.loads_lazy, ratio)
+            if full is not None and lazy is not None:
+                print(f"access ratio {ratio:g}: full {full.mean() * 1e3:.2f} ms, "
+                      f"lazy {lazy.mean() * 1e3:.2f} ms, speedup x{full.mean() / lazy.mean():.2f}")
+    elif args.api == "loads_columnar":
+        texts = [(json.dumps(obj), count_it) for obj, count_it in data
+                 if isinstance(obj, list)]
+        variants = [('pivot', lambda text: pivot(json.loads(text))),
+                    ('columnar', myjson.loads_columnar)]
+        for name, columns in variants:
+            bench = runner.bench_func(f'json_loads_{name}', bench_json_columns,
+                                      texts, columns)
+            if bench is not None:
+                print(f"{name}: {bench.mean() * 1e3:.2f} ms, "
+                      f"peak {peak_memory(texts, columns) / 1e6:.1f} MB")
+    elif args.api == "incremental":
+        states = []
+        for obj, count_it in data:
+            state = (myjson.TrackedDict(obj) if isinstance(obj, dict)
+                     else myjson.TrackedList(obj))
+            states.append((state, leaf_slots(state), count_it))
+        full = runner.bench_func('json_dumps_full', bench_json_incremental,
+                                 states, args.changes, False)
+        incremental = runner.bench_func('json_dumps_incremental', bench_json_incremental,
+                                        states, args.changes, True)
+        if full is not None and incremental is not None:
+            print(f"{args.changes} changes per encode: full {full.mean() * 1e3:.2f} ms, "
+                  f"incremental {incremental.mean() * 1e3:.2f} ms, "
+                  f"speedup x{full.mean() / incremental.mean():.2f}")
+    elif args.api == "objects":
+        graph, count = ORDERS
+        full = runner.bench_func('json_dumps_default_vars', bench_json_objects,
+                                 graph, range(count), options, False)
+        compiled = runner.bench_func('json_dumps_objects', bench_json_objects,
+                                     graph, range(count), options, True)
+        if full is not None and compiled is not None:
+            print(f"object graph: default=vars {full.mean() * 1e3:.2f} ms, "
+                  f"objects=True {compiled.mean() * 1e3:.2f} ms, "
+                  f"speedup x{full.mean() / compiled.mean():.2f}")
+    elif args.api == "dump_async":
+        for name, send in (('whole', send_whole), ('streamed', send_streamed)):
+            bench = runner.bench_func(f'json_dump_async_{name}', bench_json_dump_async,
+                                      data, send)
+            if bench is not None:
+                lag = asyncio.run(heartbeat_lag(send, data))
+                print(f"{name}: {bench.mean() * 1e3:.2f} ms, "
+                      f"worst loop delay {lag * 1e3:.2f} ms")
+    elif args.api == "dump":
+        bench = runner.bench_func('json_dump', bench_json_dump, data, args.dump_buffer)
+        if bench is not None:
+            size = payload_bytes(data)
+            print(f"json_dump throughput: {size / bench.mean() / 1e6:.1f} MB/s "
+                  f"({size} bytes per loop, buffer {args.dump_buffer})")
+    elif args.impl == "parallel":
+        # Every top-level container is split, whatever its size.
+        worker_counts = [int(n) for n in args.workers.split(",") if n.strip()]
+        results = []
+        for n in worker_counts:
+            json.dumps = functools.partial(myjson.dumps, parallel=True, workers=n,
+                                           parallel_threshold=0)
+            results.append((n, runner.bench_func(f'json_dumps_parallel_{n}',
+                                                 bench_json_dumps, data, options)))
+            # Don't keep n idle workers around while the next count runs
+            myjson.worker_pool_shutdown()
+        if all(bench is not None for _, bench in results):
+            base = results[0][1].mean()
+            for n, bench in results:
+                print(f"workers={n}: {bench.mean() * 1e3:.2f} ms, "
+                      f"speedup x{base / bench.mean():.2f} vs workers={results[0][0]}")
+    else:
+        name = 'json_dumps' if args.options == 'default' else f'json_dumps_{args.options}'
+        runner.bench_func(name, bench_json_dumps, data, options)
 
 
 if __name__ == '__main__':
@@ -4,14 +4,62 @@ This allows for modifications and performance optimizations while maintaining
 compatibility with the original API.
 """
 
+import asyncio
+import atexit
 import codecs
-from json.decoder import JSONDecoder, JSONDecodeError
-from json.encoder import JSONEncoder
+import copy
+import dataclasses
+import io
+import keyword
+import mmap
+import os
+import re
+import sys
+import threading
+import weakref
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from functools import partial
+from itertools import islice
+from json.decoder import JSONDecoder, JSONDecodeError, scanstring
+from json.encoder import (INFINITY, JSONEncoder, _make_iterencode,
+                          c_make_encoder, encode_basestring,
+                          encode_basestring_ascii)
+from operator import itemgetter
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+    _orjson_fragment = None
+else:
+    _orjson_fragment = getattr(_orjson, 'Fragment', None)
+
+try:
+    import ujson as _ujson
+except ImportError:
+    _ujson = None
+
+try:
+    import numpy as _numpy
+except ImportError:
+    _numpy = None
 
 __version__ = '2.0.9'
 __all__ = [
-    'dump', 'dumps', 'load', 'loads',
+    'dump', 'dump_async', 'dumps', 'load', 'loads', 'iterload', 'loads_lazy',
+    'LazyObject', 'LazyArray', 'Record', 'loads_columnar',
+    'TrackedDict', 'TrackedList', 'RawJSON',
     'JSONDecoder', 'JSONDecodeError', 'JSONEncoder',
+    'dumps_optimized', 'dumps_fast', 'dumps_bytes', 'encode_into',
+    'dumps_many', 'dump_ndjson', 'worker_pool_shutdown', 'fast_backends',
+    'FragmentCache', 'configure_fragment_cache', 'fragment_cache_stats',
+    'fragment_cache_clear',
+    'configure_instance_pool', 'instance_pool_stats', 'instance_pool_clear',
+    'DumpsCache', 'configure_cache', 'cache_stats', 'cache_clear',
 ]
 
 __author__ = 'Bob Ippolito <bob@redivi.com>'
@@ -28,11 +76,18 @@ _default_encoder = JSONEncoder(
 
 _fast_c_encoder = None
 
+_DUMP_BUFFER_SIZE = 64 * 1024
+# dump_async() streams nested containers of at least this many items
+# item by item, so no single encode step covers a large subtree.
+_ASYNC_SPLIT_LENGTH = 64
+
+
 def dump(obj, fp, *, skipkeys=False, ensure_ascii=True, check_circular=True,
         allow_nan=True, cls=None, indent=None, separators=None,
-        default=None, sort_keys=False, **kw):
+        default=None, sort_keys=False, buffer_size=None, **kw):
     """Serialize ``obj`` as a JSON formatted stream to ``fp`` (a
-    ``.write()``-supporting file-like object).
+    ``.write()``-supporting file-like object, a binary file such as an
+    ``io.RawIOBase``, or a raw file descriptor ``int``).
 
     If ``skipkeys`` is true then ``dict`` keys that are not basic types
     (``str``, ``int``, ``float``, ``bool``, ``None``) will be skipped
@@ -71,29 +126,100 @@ def dump(obj, fp, *, skipkeys=False, ensure_ascii=True, check_circular=True,
     ``.default()`` method to serialize additional types), specify it with
     the ``cls`` kwarg; otherwise ``JSONEncoder`` is used.
 
+    If *buffer_size* is given, the text is collected into writes of about
+    that many characters (bytes for binary targets) instead of one write
+    per token.  Binary targets (file descriptors, ``io.RawIOBase`` and
+    ``io.BufferedIOBase``) receive UTF-8 and are always buffered, by
+    default in 64 KiB writes.  In buffered mode each top-level array item
+    or object member is encoded in one piece (by the C encoder when the
+    options allow it), so memory stays bounded by the largest of them
+    rather than by the whole document.
+
     """
     # cached encoder
     if (not skipkeys and ensure_ascii and
         check_circular and allow_nan and
         cls is None and indent is None and separators is None and
         default is None and not sort_keys and not kw):
-        iterable = _default_encoder.iterencode(obj)
+        encoder = _default_encoder
     else:
-        if cls is None:
-            cls = JSONEncoder
-        iterable = cls(skipkeys=skipkeys, ensure_ascii=ensure_ascii,
-            check_circular=check_circular, allow_nan=allow_nan, indent=indent,
-            separators=separators,
-            default=default, sort_keys=sort_keys, **kw).iterencode(obj)
-    # could accelerate with writelines in some versions of Python, at
-    # a debuggability cost
-    for chunk in iterable:
-        fp.write(chunk)
+        encoder = _pooled_encoder(cls, skipkeys, ensure_ascii, check_circular,
+                                  allow_nan, indent, separators, default,
+                                  sort_keys, kw)
+    binary = isinstance(fp, (int, io.RawIOBase, io.BufferedIOBase))
+    if buffer_size is None:
+        if binary:
+            buffer_size = _DUMP_BUFFER_SIZE
+        else:
+            # could accelerate with writelines in some versions of Python,
+            # at a debuggability cost
+            for chunk in _raw_chunks(encoder.iterencode(obj),
+                                     encoder.ensure_ascii):
+                fp.write(chunk)
+            return
+    _write_buffered(_raw_chunks(_iterencode_stream(encoder, obj),
+                                encoder.ensure_ascii),
+                    _stream_writer(fp), binary, buffer_size)
+
+
+async def dump_async(obj, writer, *, chunk_size=_DUMP_BUFFER_SIZE,
+                     skipkeys=False, ensure_ascii=True, check_circular=True,
+                     allow_nan=True, cls=None, indent=None, separators=None,
+                     default=None, sort_keys=False, **kw):
+    """Serialize ``obj`` as a JSON formatted stream to the asyncio
+    ``writer`` (an ``asyncio.StreamWriter`` or any object with
+    ``write(bytes)`` and a coroutine ``drain()``).
+
+    The text is written as UTF-8 in pieces of about *chunk_size*
+    characters.  ``writer.drain()`` is awaited after each piece, so a slow
+    peer holds the encoding back instead of letting output pile up in
+    memory, and control returns to the event loop between pieces, so
+    other tasks keep running while a large document is encoded.  Array
+    items and object members are encoded in one piece (by the C encoder
+    when the options allow it) unless they are themselves containers of
+    many items, which are streamed the same way.
+
+    The other arguments have the same meaning as in ``dump()``.  The
+    output is the same as ``dumps()``.
+    """
+    if (not skipkeys and ensure_ascii and
+        check_circular and allow_nan and
+        cls is None and indent is None and separators is None and
+        default is None and not sort_keys and not kw):
+        encoder = _default_encoder
+    else:
+        encoder = _pooled_encoder(cls, skipkeys, ensure_ascii, check_circular,
+                                  allow_nan, indent, separators, default,
+                                  sort_keys, kw)
+    # Placeholders are substituted chunk by chunk before any await, so
+    # other dumps running on this thread meanwhile never see them.
+    chunks = _raw_chunks(
+        _iterencode_stream(encoder, obj, split_length=_ASYNC_SPLIT_LENGTH),
+        encoder.ensure_ascii)
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= chunk_size:
+            writer.write(''.join(pending).encode('utf-8'))
+            pending.clear()
+            pending_size = 0
+            await writer.drain()
+            # drain() returns at once while the transport buffer is below
+            # its high-water mark; yield to the loop anyway.
+            await asyncio.sleep(0)
+    if pending:
+        writer.write(''.join(pending).encode('utf-8'))
+        await writer.drain()
 
 
 def dumps(obj, *, skipkeys=False, ensure_ascii=True, check_circular=True,
         allow_nan=True, cls=None, indent=None, separators=None,
-        default=None, sort_keys=False, **kw):
+        default=None, sort_keys=False, memoize=False, specialize=False,
+        incremental=False, objects=False, namedtuple_as_object=False,
+        acyclic=False, parallel=False, workers=None, parallel_threshold=None,
+        **kw):
     """Serialize ``obj`` to a JSON formatted ``str``.
 
     If ``skipkeys`` is true then ``dict`` keys that are not basic types
@@ -133,20 +259,116 @@ def dumps(obj, *, skipkeys=False, ensure_ascii=True, check_circular=True,
     ``.default()`` method to serialize additional types), specify it with
     the ``cls`` kwarg; otherwise ``JSONEncoder`` is used.
 
+    If *memoize* is true, a container referenced several times inside
+    ``obj`` is encoded once and its text reused for the other references.
+    The output is unchanged; the cost follows the number of distinct
+    containers instead of the number of references.
+
+    If *specialize* is true, dicts that share a key set and value types
+    (a "shape") are written by a serializer generated for that shape, with
+    pre-escaped keys.  This only applies where the pure-Python encoder
+    would otherwise run (``indent`` set, or no C accelerator); the C
+    encoder is faster still.  The output is unchanged.
+
+    If *incremental* is true, each ``TrackedDict`` and ``TrackedList`` in
+    ``obj`` keeps its text for the next call with the same options, and
+    only the items changed since are encoded again, so a document updated
+    in a few places costs about the size of the change.  The rest of
+    ``obj`` is encoded by a Python-level walker.  The output is unchanged.
+
+    If *objects* is true, dataclasses and objects of classes with only
+    ``__slots__`` are written as JSON objects of their fields, and ``Enum``
+    members as their value, without calling ``default``.  A serializer is
+    compiled and cached for each class.  If *namedtuple_as_object* is true,
+    namedtuples are written as JSON objects of their fields instead of
+    arrays.  Other objects still go to ``default``.
+
+    If *acyclic* is true, the caller guarantees that ``obj`` has no
+    cycles and it is encoded without the bookkeeping ``check_circular``
+    needs.  A cycle then runs out of recursion depth, and the same
+    ``ValueError("Circular reference detected")`` as with the check is
+    raised: directly if the cycle goes through lists, tuples and dicts
+    only, otherwise by encoding once more with the check (so ``default``
+    sees those objects again).  Only that error path encodes twice.  With
+    *memoize* and no ``default``, a document that the memoization pass
+    finds free of repeated containers skips the bookkeeping as well.
+
+    If *parallel* is true and ``obj`` is a list, tuple or dict with at
+    least *parallel_threshold* items (default 10000), its items are split
+    into chunks encoded by *workers* processes (default: one per CPU;
+    threads on free-threaded builds) and joined into the same text serial
+    encoding gives.  Items and options must be picklable for processes.
+    The pool is kept for later calls until ``worker_pool_shutdown()``.
+
     """
+    # All options at their defaults: the cached C encoder, nothing else
+    if (not (skipkeys or sort_keys or kw or memoize or specialize
+             or incremental or objects or namedtuple_as_object or acyclic
+             or parallel)
+            and ensure_ascii and check_circular and allow_nan
+            and cls is None and indent is None and separators is None
+            and default is None and c_make_encoder is not None):
+        pending = _raw_state.pending
+        try:
+            text = _default_encoder.encode(obj)
+        except BaseException:
+            _raw_state.pending = pending
+            raise
+        if _raw_state.pending != pending:
+            text = _substitute_raw(text, True)
+        return text
+    if (parallel and not skipkeys and not incremental and obj
+            and isinstance(obj, (list, tuple, dict))
+            and not (namedtuple_as_object and hasattr(obj, '_fields'))
+            and len(obj) >= (_PARALLEL_THRESHOLD if parallel_threshold is None
+                             else parallel_threshold)):
+        return _encode_parallel(obj, workers, dict(
+            ensure_ascii=ensure_ascii, check_circular=check_circular,
+            allow_nan=allow_nan, cls=cls, indent=indent,
+            separators=separators, default=default, sort_keys=sort_keys,
+            memoize=memoize, specialize=specialize, objects=objects,
+            namedtuple_as_object=namedtuple_as_object, acyclic=acyclic, **kw))
     # cached encoder
     if (not skipkeys and ensure_ascii and
         check_circular and allow_nan and
         cls is None and indent is None and separators is None and
         default is None and not sort_keys and not kw):
-        return _default_encoder.encode(obj)
-    if cls is None:
-        cls = JSONEncoder
-    return cls(
-        skipkeys=skipkeys, ensure_ascii=ensure_ascii,
-        check_circular=check_circular, allow_nan=allow_nan, indent=indent,
-        separators=separators, default=default, sort_keys=sort_keys,
-        **kw).encode(obj)
+        encoder = _default_encoder
+    else:
+        encoder = _pooled_encoder(cls, skipkeys, ensure_ascii, check_circular,
+                                  allow_nan, indent, separators, default,
+                                  sort_keys, kw)
+    options = (memoize, specialize, incremental, objects, namedtuple_as_object)
+    if acyclic and encoder.check_circular:
+        try:
+            return _encode(_unchecked_encoder(encoder), obj, *options)
+        except RecursionError:
+            if _has_cycle(obj):
+                raise ValueError("Circular reference detected") from None
+            # Too deep, or a cycle through objects default returns, which
+            # _has_cycle can't see: the checked encoder tells them apart.
+    return _encode(encoder, obj, *options)
+
+
+def _encode(encoder, obj, memoize, specialize, incremental, objects,
+            namedtuple_as_object):
+    """The encoding step of ``dumps`` once ``encoder`` is chosen."""
+    if memoize or specialize or incremental or objects or namedtuple_as_object:
+        encode = partial(_encode_walked, encoder, memoize=memoize,
+                         specialize=specialize, incremental=incremental,
+                         objects=objects,
+                         namedtuple_as_object=namedtuple_as_object)
+    elif _uses_c_encoder(encoder):
+        encode = encoder.encode
+    else:
+        if (encoder.default is _extended_default
+                and isinstance(obj, _NUMERIC_CONTAINERS)):
+            obj = _extended_default(obj)
+        if _has_numeric_run(encoder, obj):
+            encode = partial(_encode_walked, encoder, numeric=True)
+        else:
+            encode = encoder.encode
+    return _encode_raw(encode, obj, encoder.ensure_ascii)
 
 
 _default_decoder = JSONDecoder(object_hook=None, object_pairs_hook=None)
@@ -183,7 +405,8 @@ def detect_encoding(b):
 
 
 def load(fp, *, cls=None, object_hook=None, parse_float=None,
-        parse_int=None, parse_constant=None, object_pairs_hook=None, **kw):
+        parse_int=None, parse_constant=None, object_pairs_hook=None,
+        intern_keys=False, intern_values=False, records=False, **kw):
     """Deserialize ``fp`` (a ``.read()``-supporting file-like object containing
     a JSON document) to a Python object.
 
@@ -198,17 +421,22 @@ def load(fp, *, cls=None, object_hook=None, parse_float=None,
     This feature can be used to implement custom decoders.  If ``object_hook``
     is also defined, the ``object_pairs_hook`` takes priority.
 
+    ``intern_keys``, ``intern_values`` and ``records`` are as for ``loads``.
+
     To use a custom ``JSONDecoder`` subclass, specify it with the ``cls``
     kwarg; otherwise ``JSONDecoder`` is used.
     """
     return loads(fp.read(),
         cls=cls, object_hook=object_hook,
         parse_float=parse_float, parse_int=parse_int,
-        parse_constant=parse_constant, object_pairs_hook=object_pairs_hook, **kw)
+        parse_constant=parse_constant, object_pairs_hook=object_pairs_hook,
+        intern_keys=intern_keys, intern_values=intern_values,
+        records=records, **kw)
 
 
 def loads(s, *, cls=None, object_hook=None, parse_float=None,
-        parse_int=None, parse_constant=None, object_pairs_hook=None, **kw):
+        parse_int=None, parse_constant=None, object_pairs_hook=None,
+        intern_keys=False, intern_values=False, records=False, **kw):
     """Deserialize ``s`` (a ``str``, ``bytes`` or ``bytearray`` instance
     containing a JSON document) to a Python object.
 
@@ -238,6 +466,15 @@ def loads(s, *, cls=None, object_hook=None, parse_float=None,
     This can be used to raise an exception if invalid JSON numbers
     are encountered.
 
+    If ``intern_keys`` is true, object keys are interned (``sys.intern``),
+    so repeated keys share one string across documents too (within a
+    document the decoder already shares them).  If ``intern_values`` is
+    true, the same is done for string member values of up to 32
+    characters.  If ``records`` is true, objects are decoded as compact
+    read-only ``Record`` mappings, one type per key set (up to 1024 key
+    sets, then dicts); it cannot be combined with ``object_hook`` or
+    ``object_pairs_hook``.
+
     To use a custom ``JSONDecoder`` subclass, specify it with the ``cls``
     kwarg; otherwise ``JSONDecoder`` is used.
     """
@@ -253,84 +490,3577 @@ def loads(s, *, cls=None, object_hook=None, parse_float=None,
 
     if (cls is None and object_hook is None and
             parse_int is None and parse_float is None and
-            parse_constant is None and object_pairs_hook is None and not kw):
+            parse_constant is None and object_pairs_hook is None and
+            not intern_keys and not intern_values and not records and
+            not kw):
         return _default_decoder.decode(s)
-    if cls is None:
-        cls = JSONDecoder
-    if object_hook is not None:
-        kw['object_hook'] = object_hook
-    if object_pairs_hook is not None:
-        kw['object_pairs_hook'] = object_pairs_hook
-    if parse_float is not None:
-        kw['parse_float'] = parse_float
-    if parse_int is not None:
-        kw['parse_int'] = parse_int
-    if parse_constant is not None:
-        kw['parse_constant'] = parse_constant
-    return cls(**kw).decode(s)
-
-
-_cache: dict[int, str] = {}   # global cache per run
+    object_hook, object_pairs_hook = _interning_hooks(
+        intern_keys, intern_values, records, object_hook, object_pairs_hook)
+    return _pooled_decoder(cls, object_hook, parse_float, parse_int,
+                           parse_constant, object_pairs_hook, kw).decode(s)
 
-def dumps_optimized(obj, *, skipkeys=False, ensure_ascii=True, check_circular=True,
-                   allow_nan=True, cls=None, indent=None, separators=None,
-                   default=None, sort_keys=False, **kw):
+
+# --- Pre-serialized JSON fragments ---
+
+class RawJSON:
+    """JSON text written as is in place of a value.
+
+    ``RawJSON(data)`` wraps a JSON document given as ``str`` or as ``bytes``
+    in one of the encodings ``loads`` accepts.  It is not parsed unless
+    *validate* is true, in which case an invalid document raises
+    ``JSONDecodeError``.  Every encoder here writes the text verbatim: it
+    is not re-indented, and with ``ensure_ascii`` only its non-ASCII
+    characters are escaped.
     """
-    Optimized dumps with:
-    - Primitive fast-paths (None/True/False/int/float)
-    - Caching of repeated objects
-    - Fallback to standard JSONEncoder for all other cases
+
+    __slots__ = ('text', '_ascii')
+
+    def __init__(self, data, *, validate=False):
+        if isinstance(data, str):
+            text = str(data)
+        elif isinstance(data, (bytes, bytearray)):
+            text = data.decode(detect_encoding(data), 'surrogatepass')
+        else:
+            raise TypeError(f'RawJSON needs str, bytes or bytearray, '
+                            f'not {data.__class__.__name__}')
+        if validate:
+            loads(text)
+        self.text = text
+        self._ascii = None
+
+    def _encoded(self, ensure_ascii):
+        """The text to write, with non-ASCII escaped if ``ensure_ascii``."""
+        if not ensure_ascii:
+            return self.text
+        text = self._ascii
+        if text is None:
+            text = self.text
+            if not text.isascii():
+                text = _NON_ASCII.sub(_escape_non_ascii, text)
+            self._ascii = text
+        return text
+
+    def __json__(self):
+        # ujson writes what __json__ returns without encoding it.
+        return self.text
+
+    def __eq__(self, other):
+        if isinstance(other, RawJSON):
+            return self.text == other.text
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.text)
+
+    def __reduce__(self):
+        return RawJSON, (self.text,)
+
+    def __repr__(self):
+        return f'RawJSON({self.text!r})'
+
+
+_NON_ASCII = re.compile(r'[^\x00-\x7f]+')
+
+
+def _escape_non_ascii(match):
+    # Only strings can hold non-ASCII characters in valid JSON, so the
+    # escapes of the string encoder are the ones json.dumps would write.
+    return encode_basestring_ascii(match.group())[1:-1]
+
+
+# The C encoder and the other backends only reach RawJSON through
+# ``default``, which must return a value to encode.  It returns a string
+# holding a random marker and the raw text; the string literal is found in
+# the output afterwards, decoded back with ``scanstring`` and replaced by
+# the raw text.  ``_raw_state.pending`` counts, per thread, the literals
+# handed out and not yet replaced, so output is only searched when the call
+# that produced it handed some out.  A call that fails midway resets the
+# count to what it was before the call.
+_RAW_MARKER = f'rawjson-{os.urandom(8).hex()}:'
+_RAW_LITERAL = '"' + _RAW_MARKER
+
+
+class _RawState(threading.local):
+    pending = 0
+
+
+_raw_state = _RawState()
+
+
+def _raw_placeholder(raw):
+    """Return the string ``default`` hands to an encoder for ``raw``."""
+    _raw_state.pending += 1
+    return _RAW_MARKER + raw.text
+
+
+def _substitute_raw(text, ensure_ascii):
+    """Replace the placeholder literals in ``text`` by their raw JSON."""
+    start = text.find(_RAW_LITERAL)
+    if start < 0:
+        return text
+    parts = []
+    pos = 0
+    skip = len(_RAW_MARKER)
+    while start >= 0:
+        raw, end = scanstring(text, start + 1)
+        raw = raw[skip:]
+        if ensure_ascii and not raw.isascii():
+            raw = _NON_ASCII.sub(_escape_non_ascii, raw)
+        parts.append(text[pos:start])
+        parts.append(raw)
+        _raw_state.pending -= 1
+        pos = end
+        start = text.find(_RAW_LITERAL, pos)
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def _encode_raw(encode, obj, ensure_ascii):
+    """``encode(obj)`` with the ``RawJSON`` placeholders it made replaced."""
+    pending = _raw_state.pending
+    try:
+        text = encode(obj)
+    except BaseException:
+        _raw_state.pending = pending
+        raise
+    if _raw_state.pending != pending:
+        text = _substitute_raw(text, ensure_ascii)
+    return text
+
+
+def _with_raw_json(default):
+    """Wrap a user ``default`` so that ``RawJSON`` is written verbatim."""
+    def raw_json_default(o):
+        if isinstance(o, RawJSON):
+            return _raw_placeholder(o)
+        return default(o)
+    return raw_json_default
+
+
+# --- Bulk encoding of numeric sequences ---
+
+_NUMERIC_MIN_LENGTH = 16
+_NUMBER_TYPES = frozenset((int, float))
+_ARRAY_NUMBER_CODES = frozenset('bBhHiIlLqQfd')
+_MEMORYVIEW_NUMBER_FORMATS = frozenset('bBhHiIlLqQnNfd?')
+if _numpy is not None:
+    _NUMERIC_CONTAINERS = (array, memoryview, _numpy.ndarray)
+else:
+    _NUMERIC_CONTAINERS = (array, memoryview)
+_NUMERIC_RUN_TYPES = frozenset((list, tuple) + _NUMERIC_CONTAINERS)
+
+
+def _numeric_list(o):
+    """Return a numeric ``array``, ``memoryview`` or NumPy array as a list.
+
+    Returns ``None`` for anything else, including arrays of characters,
+    memoryviews of structs and NumPy arrays of non-numeric dtypes.
     """
+    if isinstance(o, array):
+        if o.typecode in _ARRAY_NUMBER_CODES:
+            return o.tolist()
+    elif isinstance(o, memoryview):
+        if o.format.lstrip('@=<>!') in _MEMORYVIEW_NUMBER_FORMATS:
+            return o.tolist()
+    elif _numpy is not None and isinstance(o, _numpy.ndarray):
+        if o.dtype.kind in 'biuf':
+            return o.tolist()
+    return None
 
-    if separators is None and indent is None:
-        separators = (',', ':')
 
-    # Primitive fast path
-    if obj is None:
-        return "null"
-    if obj is True:
-        return "true"
-    if obj is False:
-        return "false"
-    if isinstance(obj, (int, float)):
-        return str(obj)
-    if isinstance(obj, str):
-        return json.dumps(obj, ensure_ascii=ensure_ascii)
+def _extended_default(o):
+    """``JSONEncoder.default`` that also encodes numeric arrays as lists
+    and ``RawJSON`` verbatim."""
+    if isinstance(o, RawJSON):
+        return _raw_placeholder(o)
+    values = _numeric_list(o)
+    if values is None:
+        raise TypeError(f'Object of type {o.__class__.__name__} '
+                        f'is not JSON serializable')
+    return values
 
-    # Check cache
-    if isinstance(obj, (dict, list, tuple)):
-        obj_id = id(obj)
-        if obj_id in _cache:
-            return _cache[obj_id]
 
-    # Fallback: use the standard dumps (default encoder)
-    result = dumps(obj, skipkeys=skipkeys, ensure_ascii=ensure_ascii,
-                   check_circular=check_circular, allow_nan=allow_nan,
-                   cls=cls, indent=indent, separators=separators,
-                   default=default, sort_keys=sort_keys, **kw)
+# Encoders that keep the stock ``default`` get the extended one instead, so
+# the C encoder writes the list ``tolist()`` builds.  The output only
+# changes for values the stock ``default`` rejects.
+_default_encoder.default = _extended_default
 
-    if isinstance(obj, (dict, list, tuple)):
-        _cache[id(obj)] = result
-    return result
 
+def _encode_numbers(values, separator, floatstr):
+    """Join a sequence of exact ints and floats in one pass.
+
+    Returns ``None`` if ``values`` holds anything else (including ``bool``
+    and ``int``/``float`` subclasses, which keep their per-item encoding).
+    ``nan`` and the infinities are spelled, or rejected, by ``floatstr``.
+    """
+    types = set(map(type, values))
+    if not types <= _NUMBER_TYPES:
+        return None
+    text = separator.join(map(repr, values))
+    if float in types and 'n' in text:
+        # Only nan, inf and -inf have an 'n' in their repr.
+        text = separator.join([floatstr(v) if v.__class__ is float
+                               else repr(v) for v in values])
+    return text
+
+
+def _has_numeric_run(encoder, obj):
+    """Whether ``obj`` is worth walking in Python for bulk number joining.
+
+    True if ``obj`` is a long list or tuple, or a list, tuple or dict whose
+    items include a long list or tuple or a numeric array.  The walker
+    beats the pure-Python ``iterencode`` on those, but not on small values,
+    so this is a quick exact-type look at the top level only.
+    """
+    if isinstance(obj, dict):
+        values = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        if len(obj) >= _NUMERIC_MIN_LENGTH:
+            return _walkable(encoder)
+        values = obj
+    else:
+        return False
+    for value in values:
+        if value.__class__ in _NUMERIC_RUN_TYPES:
+            if (not isinstance(value, (list, tuple))
+                    or len(value) >= _NUMERIC_MIN_LENGTH):
+                return _walkable(encoder)
+    return False
+
+
+def _walkable(encoder):
+    """Whether ``encoder`` leaves ``encode``/``iterencode`` as they are."""
+    cls = type(encoder)
+    return (cls.encode is JSONEncoder.encode
+            and cls.iterencode is JSONEncoder.iterencode)
+
+
+# --- Pool of configured encoder and decoder instances ---
+
+class _InstancePool:
+    """Bounded LRU pool of configured encoders or decoders.
+
+    Instances are keyed by the tuple of their constructor options and
+    shared by every call with the same options, as ``_default_encoder`` and
+    ``_default_decoder`` are for the defaults: ``encode`` and ``decode``
+    keep no state between calls.  A custom ``cls`` must allow the same
+    reuse.  Calls with an unhashable option value (e.g. ``separators``
+    given as a list) are not pooled.
+    """
+
+    def __init__(self, max_entries=64):
+        self._instances = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        """Return the pooled instance for ``key`` or ``None``."""
+        # Lock-free: each OrderedDict operation is atomic, and a key evicted
+        # between the two steps is simply a miss.
+        instances = self._instances
+        try:
+            instance = instances[key]
+            instances.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        except TypeError:   # unhashable option value
+            return None
+        self.hits += 1
+        return instance
+
+    def put(self, key, instance):
+        """Pool ``instance`` under ``key``, evicting the least recent."""
+        try:
+            hash(key)
+        except TypeError:
+            return
+        with self._lock:
+            self._instances[key] = instance
+            self._instances.move_to_end(key)
+            self._shrink()
+
+    def _shrink(self):
+        # Caller holds the lock.
+        while len(self._instances) > self.max_entries:
+            self._instances.popitem(last=False)
+            self.evictions += 1
+
+    def configure(self, *, max_entries=None):
+        """Change the size limit, evicting instances if needed."""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self._shrink()
+
+    def clear(self):
+        """Drop every instance and reset the counters."""
+        with self._lock:
+            self._instances.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return a dict with the pool size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._instances),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_encoder_pool = _InstancePool()
+_COMPACT_SEPARATORS = (',', ':')
+_compact_encoders = {
+    ensure_ascii: JSONEncoder(ensure_ascii=ensure_ascii,
+                              separators=_COMPACT_SEPARATORS,
+                              default=_extended_default)
+    for ensure_ascii in (False, True)
+}
+_decoder_pool = _InstancePool()
+
+
+def _pooled_encoder(cls, skipkeys, ensure_ascii, check_circular, allow_nan,
+                    indent, separators, default, sort_keys, kw):
+    """Return a pooled encoder for non-default ``dump``/``dumps`` options."""
+    if (separators == _COMPACT_SEPARATORS and cls is None and indent is None
+            and default is None and not sort_keys and not skipkeys
+            and check_circular and allow_nan and not kw):
+        # The compact API-layer default: skip even the pool lookup.
+        return _compact_encoders[bool(ensure_ascii)]
+    if separators is not None and separators.__class__ is not tuple:
+        separators = tuple(separators)
+    key = (cls, skipkeys, ensure_ascii, check_circular, allow_nan, indent,
+           separators, default, sort_keys,
+           tuple(sorted(kw.items())) if kw else ())
+    encoder = _encoder_pool.get(key)
+    if encoder is None:
+        if cls is None:
+            cls = JSONEncoder
+        encoder = cls(
+            skipkeys=skipkeys, ensure_ascii=ensure_ascii,
+            check_circular=check_circular, allow_nan=allow_nan, indent=indent,
+            separators=separators, default=default, sort_keys=sort_keys,
+            **kw)
+        if default is None and cls.default is JSONEncoder.default:
+            encoder.default = _extended_default
+        else:
+            encoder.default = _with_raw_json(encoder.default)
+        _encoder_pool.put(key, encoder)
+    return encoder
+
+
+_unchecked_encoders = weakref.WeakKeyDictionary()
+
+
+def _unchecked_encoder(encoder):
+    """Return a copy of ``encoder`` with ``check_circular`` turned off.
+
+    The copy is kept for as long as ``encoder`` lives, so repeated calls
+    see the same instance (tracked containers key their text on it).
+    """
+    unchecked = _unchecked_encoders.get(encoder)
+    if unchecked is None:
+        unchecked = copy.copy(encoder)
+        unchecked.check_circular = False
+        _unchecked_encoders[encoder] = unchecked
+    return unchecked
+
+
+def _has_cycle(obj):
+    """Whether a list, tuple or dict reachable from ``obj`` contains itself.
+
+    The walk keeps its own stack, so it works where encoding has just run
+    out of recursion depth.  Objects ``default`` would return are not seen;
+    ``dumps`` encodes with the circular check to find those cycles.
+    """
+    if not isinstance(obj, (list, tuple, dict)):
+        return False
+    path = set()
+    done = set()
+    stack = [(obj, False)]
+    while stack:
+        o, leaving = stack.pop()
+        oid = id(o)
+        if leaving:
+            path.discard(oid)
+            done.add(oid)
+            continue
+        if oid in path:
+            return True
+        if oid in done:
+            continue
+        path.add(oid)
+        stack.append((o, True))
+        for value in (o.values() if isinstance(o, dict) else o):
+            if isinstance(value, (list, tuple, dict)):
+                stack.append((value, False))
+    return False
+
+
+def _pooled_decoder(cls, object_hook, parse_float, parse_int, parse_constant,
+                    object_pairs_hook, kw):
+    """Return a pooled decoder for non-default ``loads`` options."""
+    key = (cls, object_hook, parse_float, parse_int, parse_constant,
+           object_pairs_hook, tuple(sorted(kw.items())) if kw else ())
+    decoder = _decoder_pool.get(key)
+    if decoder is None:
+        if cls is None:
+            cls = JSONDecoder
+        if object_hook is not None:
+            kw['object_hook'] = object_hook
+        if object_pairs_hook is not None:
+            kw['object_pairs_hook'] = object_pairs_hook
+        if parse_float is not None:
+            kw['parse_float'] = parse_float
+        if parse_int is not None:
+            kw['parse_int'] = parse_int
+        if parse_constant is not None:
+            kw['parse_constant'] = parse_constant
+        decoder = cls(**kw)
+        _decoder_pool.put(key, decoder)
+    return decoder
+
+
+def configure_instance_pool(*, max_entries=None):
+    """Set how many configured encoders and decoders (each) are pooled."""
+    _encoder_pool.configure(max_entries=max_entries)
+    _decoder_pool.configure(max_entries=max_entries)
+
+
+def instance_pool_stats():
+    """Return the statistics of the encoder and decoder pools."""
+    return {'encoders': _encoder_pool.stats(),
+            'decoders': _decoder_pool.stats()}
+
+
+def instance_pool_clear():
+    """Drop every pooled encoder and decoder."""
+    _encoder_pool.clear()
+    _decoder_pool.clear()
+
+
+# --- Interning and compact records for loads ---
+
+_INTERN_MAX_LENGTH = 32
+_RECORD_MAX_TYPES = 1024
+
+
+class Record(Mapping):
+    """Compact read-only mapping made by ``loads(..., records=True)``.
+
+    There is one ``Record`` subclass per key set, holding the keys; an
+    instance only holds the tuple of values, which takes a fraction of the
+    memory of a ``dict``.  Records compare equal to dicts with the same
+    items.  ``dict(record)`` gives a plain dict, e.g. for ``dumps``.
+    """
+
+    __slots__ = ('_values',)
+    _fields = ()
+    _positions = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._positions[key]]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __reduce__(self):
+        return _make_record, (self._fields, self._values)
+
+    def __repr__(self):
+        return f'Record({dict(zip(self._fields, self._values))!r})'
+
+
+_record_types = {}
+_record_types_lock = threading.Lock()
+
+
+def _record_type(fields):
+    """Return the ``Record`` subclass for ``fields`` (or ``None``).
+
+    ``None`` means a plain dict must be used: the keys repeat (the last
+    value would win) or the bounded set of record types is full.
+    """
+    with _record_types_lock:
+        try:
+            return _record_types[fields]
+        except KeyError:
+            pass
+        if len(_record_types) >= _RECORD_MAX_TYPES:
+            return None
+        if len(set(fields)) != len(fields):
+            record_type = None
+        else:
+            fields = tuple(map(sys.intern, fields))
+            record_type = type('Record', (Record,), {
+                '__slots__': (),
+                '_fields': fields,
+                '_positions': {key: i for i, key in enumerate(fields)},
+            })
+        _record_types[fields] = record_type
+        return record_type
+
+
+def _make_record(fields, values):
+    """Rebuild a pickled record (a dict if no record type is available)."""
+    record_type = _record_type(fields)
+    if record_type is None:
+        return dict(zip(fields, values))
+    record = object.__new__(record_type)
+    record._values = values
+    return record
+
+
+def _make_pairs_hook(intern_keys, intern_values, records, object_hook,
+                     object_pairs_hook):
+    """Build the ``object_pairs_hook`` implementing the loads options."""
+    intern = sys.intern
+    new = object.__new__
+    types = _record_types
+    max_length = _INTERN_MAX_LENGTH
+
+    def pairs_hook(pairs):
+        if pairs:
+            keys, values = zip(*pairs)
+        else:
+            keys = values = ()
+        if intern_values:
+            values = tuple([
+                intern(value)
+                if value.__class__ is str and len(value) <= max_length
+                else value
+                for value in values])
+        if records:
+            record_type = types.get(keys)
+            if record_type is None and keys not in types:
+                record_type = _record_type(keys)
+            if record_type is not None:
+                record = new(record_type)
+                record._values = values
+                return record
+        if intern_keys:
+            keys = map(intern, keys)
+        if object_pairs_hook is not None:
+            return object_pairs_hook(list(zip(keys, values)))
+        result = dict(zip(keys, values))
+        if object_hook is not None:
+            return object_hook(result)
+        return result
+    return pairs_hook
+
+
+_pairs_hooks = {}
+
+
+def _interning_hooks(intern_keys, intern_values, records, object_hook,
+                     object_pairs_hook):
+    """Return ``(object_hook, object_pairs_hook)`` for the loads options.
+
+    The hooks are cached so that pooled decoders are reused across calls.
+    """
+    if not (intern_keys or intern_values or records):
+        return object_hook, object_pairs_hook
+    if records and (object_hook is not None or object_pairs_hook is not None):
+        raise TypeError('records cannot be combined with object_hook or '
+                        'object_pairs_hook')
+    key = (bool(intern_keys), bool(intern_values), bool(records),
+           object_hook, object_pairs_hook)
+    hook = _pairs_hooks.get(key)
+    if hook is None:
+        if len(_pairs_hooks) >= 64:
+            _pairs_hooks.clear()
+        hook = _pairs_hooks[key] = _make_pairs_hook(*key)
+    return None, hook
+
+
+# --- Incremental loading ---
+
+_ITERLOAD_CHUNK_SIZE = 1 << 20
+
+_WS = re.compile(r'[ \t\n\r]*')
+_SCALAR_END = re.compile(r'[ \t\n\r,\]}]')
+# Fast paths of the token-by-token parser; none of them matches text cut by
+# the end of the window, where the general (refilling) path takes over.
+_DELIMITER = re.compile(r'[ \t\n\r]*([,\]}])')
+_MEMBER_KEY = re.compile(r'[ \t\n\r]*"([^"\\\x00-\x1f]*)"[ \t\n\r]*:')
+_SKIP_SCALAR = re.compile(
+    r'[ \t\n\r]*(?:"[^"\\]*(?:\\.[^"\\]*)*"'
+    r'|(?:-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?'
+    r'|true|false|null|NaN|-?Infinity)(?=[ \t\n\r,\]}]))', re.DOTALL)
+# Strings (the closing quote is optional so a string cut by the end of the
+# window is recognised) and brackets; used to skip unselected containers.
+_SKIP_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(?P<close>")?|[\[\]{}]',
+                         re.DOTALL)
+
+
+def _binary_reader(read):
+    """Return ``read(n) -> str`` over a binary ``read(n) -> bytes``.
+
+    The encoding is detected from the first bytes like ``loads`` does for
+    ``bytes`` (BOMs, UTF-16/32 by the position of the zero bytes).
+    """
+    head = read(4)
+    decoder = codecs.getincrementaldecoder(detect_encoding(head))(
+        'surrogatepass')
+    pending = [head]
+
+    def read_text(size):
+        while True:
+            data = pending.pop() if pending else read(size)
+            text = decoder.decode(data, final=not data)
+            if text or not data:
+                return text
+    return read_text
+
+
+def _text_reader(read):
+    """Return ``read(n) -> str`` over a text file, rejecting a BOM."""
+    first = [True]
+
+    def read_text(size):
+        text = read(size)
+        if first[0] and text:
+            first[0] = False
+            if text.startswith('\ufeff'):
+                raise JSONDecodeError(
+                    "Unexpected UTF-8 BOM (decode using utf-8-sig)", text, 0)
+        return text
+    return read_text
+
+
+def _open_source(source):
+    """Return ``(read_text, close)`` for a path or a file object.
+
+    Paths and binary files backed by a file descriptor are memory-mapped
+    (from the current position of a file object), so the file is paged in
+    by the OS rather than copied into Python buffers; other file objects
+    are read through their ``read`` method.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        fp = open(source, 'rb')
+        closers = [fp.close]
+    elif isinstance(source, io.TextIOBase):
+        return _text_reader(source.read), lambda: None
+    else:
+        fp = source
+        closers = []
+    try:
+        fileno = fp.fileno()
+        start = fp.tell()
+        size = os.fstat(fileno).st_size
+    except (AttributeError, OSError, ValueError):
+        close = closers[0] if closers else (lambda: None)
+        return _binary_reader(fp.read), close
+    if size <= start:
+        data = b''
+    else:
+        data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        closers.insert(0, data.close)
+    position = [start]
+
+    def read(n):
+        pos = position[0]
+        chunk = data[pos:pos + n]
+        position[0] = pos + len(chunk)
+        return chunk
+
+    def close():
+        for closer in closers:
+            closer()
+    return _binary_reader(read), close
 
-# Example of how to integrate faster JSON libraries
-def dumps_fast(obj, **kwargs):
+
+class _IterLoader:
+    """Walk a JSON text through a sliding window of decoded text.
+
+    Only the values selected by the path are decoded (each with one
+    ``raw_decode`` call); the containers leading to them are parsed token
+    by token and everything else is skipped by bracket matching, so memory
+    is bounded by the window and the largest selected value.
     """
-    Fastest possible JSON dumps using external libraries.
-    Falls back to standard library if not available.
+
+    def __init__(self, read, decoder, chunk_size):
+        self._read = read
+        self._decoder = decoder
+        self._chunk_size = chunk_size
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        # Drop the consumed text and append at least as much as remains,
+        # so a value spanning many chunks is retried a logarithmic number
+        # of times.
+        text = self.text[self.pos:]
+        chunk = self._read(max(self._chunk_size, len(text)))
+        if not chunk:
+            self.eof = True
+        self.text = text + chunk
+        self.pos = 0
+
+    def _error(self, msg):
+        raise JSONDecodeError(msg, self.text, self.pos)
+
+    def peek(self):
+        """Skip whitespace and return the next character ('' at the end)."""
+        while True:
+            self.pos = _WS.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof:
+                return ''
+            self._fill()
+
+    def decode(self):
+        """Decode the value starting at the current position."""
+        if self.text[self.pos:self.pos + 1] not in '"[{':
+            # A number or literal cut by the end of the window may still
+            # parse ("1e+5" -> "1"): make sure its end is in the window.
+            while not self.eof and _SCALAR_END.search(self.text,
+                                                      self.pos) is None:
+                self._fill()
+        raw_decode = self._decoder.raw_decode
+        while True:
+            try:
+                value, end = raw_decode(self.text, self.pos)
+            except JSONDecodeError:
+                # A truncated string or container; an error once the whole
+                # input is in the window.
+                if self.eof:
+                    raise
+            else:
+                self.pos = end
+                return value
+            self._fill()
+
+    def delimiter(self):
+        """Skip whitespace and return the next character (fast path)."""
+        match = _DELIMITER.match(self.text, self.pos)
+        if match is None:
+            return self.peek()
+        self.pos = match.end() - 1
+        return match.group(1)
+
+    def skip(self):
+        """Skip the value at the current position without decoding it."""
+        match = _SKIP_SCALAR.match(self.text, self.pos)
+        if match is not None:
+            self.pos = match.end()
+            return
+        if self.peek() not in '[{':
+            self.decode()
+            return
+        closers = []
+        while True:
+            for match in _SKIP_TOKEN.finditer(self.text, self.pos):
+                token = match.group()
+                if token[0] == '"':
+                    if match.group('close') is None:
+                        # Cut by the end of the window: refill, retry.
+                        self.pos = match.start()
+                        break
+                elif token in '[{':
+                    closers.append(']' if token == '[' else '}')
+                elif not closers or closers.pop() != token:
+                    self.pos = match.start()
+                    self._error('Mismatched bracket')
+                elif not closers:
+                    self.pos = match.end()
+                    return
+            else:
+                self.pos = len(self.text)
+            if self.eof:
+                self._error('Unterminated container')
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            self._error(f'Expecting {char!r} delimiter')
+        self.pos += 1
+
+    def select(self, path, depth=0):
+        """Yield the values at ``path`` below the value at the position."""
+        char = self.peek()
+        if depth == len(path):
+            yield self.decode()
+            return
+        if char == '[' and path[depth] == 'item':
+            self.pos += 1
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            while True:
+                yield from self.select(path, depth + 1)
+                char = self.delimiter()
+                self.pos += 1
+                if char == ']':
+                    return
+                if char != ',':
+                    self.pos -= 1
+                    self._error("Expecting ',' delimiter")
+        elif char == '{':
+            self.pos += 1
+            if self.peek() == '}':
+                self.pos += 1
+                return
+            while True:
+                match = _MEMBER_KEY.match(self.text, self.pos)
+                if match is not None:
+                    key = match.group(1)
+                    self.pos = match.end()
+                else:   # escapes, or cut by the end of the window
+                    if self.peek() != '"':
+                        self._error('Expecting property name enclosed in '
+                                    'double quotes')
+                    key = self.decode()
+                    self.expect(':')
+                if key == path[depth]:
+                    yield from self.select(path, depth + 1)
+                else:
+                    self.skip()
+                char = self.delimiter()
+                self.pos += 1
+                if char == '}':
+                    return
+                if char != ',':
+                    self.pos -= 1
+                    self._error("Expecting ',' delimiter")
+        else:
+            self.skip()
+
+
+def iterload(source, prefix='item', *, chunk_size=_ITERLOAD_CHUNK_SIZE,
+             cls=None, object_hook=None, parse_float=None, parse_int=None,
+             parse_constant=None, object_pairs_hook=None, intern_keys=False,
+             intern_values=False, records=False, **kw):
+    """Incrementally deserialize the values at ``prefix`` in a JSON document.
+
+    ``source`` is a path or a file object.  Paths and binary files with a
+    file descriptor are memory-mapped; the bytes are decoded following the
+    same BOM and encoding rules as ``loads`` (see ``detect_encoding``).
+    Text files are read as they are and, as for ``loads`` on a ``str``, a
+    leading BOM is an error.
+
+    ``prefix`` selects the values to yield: a dotted path of object keys,
+    where ``item`` stands for every element of an array (``'item'`` yields
+    the items of a top-level array, ``'rows.item.id'`` the ``id`` of every
+    element of the ``rows`` array, ``''`` the whole document).  A tuple of
+    components may be given instead, for keys containing dots.  The values
+    are yielded in document order as they are reached, so memory is bounded
+    by ``chunk_size`` and the largest selected value rather than by the
+    size of the file.
+
+    Selected values are decoded, and errors raised, like ``loads`` with the
+    other keyword arguments (``intern_keys`` makes the items share their
+    keys, which each ``loads`` call would copy).  The rest of the document is only checked for
+    balanced brackets and terminated strings.  Error positions are relative
+    to the window being parsed.
     """
+    if isinstance(prefix, str):
+        path = tuple(prefix.split('.')) if prefix else ()
+    else:
+        path = tuple(prefix)
+    object_hook, object_pairs_hook = _interning_hooks(
+        intern_keys, intern_values, records, object_hook, object_pairs_hook)
+    if (cls is None and object_hook is None and parse_int is None and
+            parse_float is None and parse_constant is None and
+            object_pairs_hook is None and not kw):
+        decoder = _default_decoder
+    else:
+        decoder = _pooled_decoder(cls, object_hook, parse_float, parse_int,
+                                  parse_constant, object_pairs_hook, kw)
+    read, close = _open_source(source)
     try:
-        import orjson
-        # orjson returns bytes, so decode to string
-        return orjson.dumps(obj).decode('utf-8')
-    except ImportError:
+        loader = _IterLoader(read, decoder, chunk_size)
+        if not loader.peek():
+            loader._error('Expecting value')
+        yield from loader.select(path)
+        if loader.peek():
+            loader._error('Extra data')
+    finally:
+        close()
+
+
+# --- Lazy decoding with an offset index ---
+
+_LAZY_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+# A container nested at most _LAZY_DEPTH deep, matched by a single regex
+# call without building any object.  Brackets are not paired by type and
+# the content is not validated; the decoder does that on access.
+_LAZY_DEPTH = 6
+if sys.version_info >= (3, 11):
+    # Possessive quantifiers never backtrack: several times faster.
+    _lazy_item = r'"[^"\\]*+(?:\\.[^"\\]*+)*+"|[^{}\[\]"]++'
+    _lazy_container = r'[\[{](?:%s)*+[\]}]' % _lazy_item
+    for _ in range(_LAZY_DEPTH - 1):
+        _lazy_container = r'[\[{](?:%s|%s)*+[\]}]' % (_lazy_item,
+                                                     _lazy_container)
+else:
+    # One way to match each character, so failures stay linear.
+    _lazy_item = _LAZY_STRING + r'|[^{}\[\]"]'
+    _lazy_container = r'[\[{](?:%s)*[\]}]' % _lazy_item
+    for _ in range(_LAZY_DEPTH - 1):
+        _lazy_container = r'[\[{](?:%s|%s)*[\]}]' % (_lazy_item,
+                                                    _lazy_container)
+_LAZY_VALUE = re.compile(
+    r'%s|%s|-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?'
+    r'|true|false|null|NaN|-?Infinity' % (_LAZY_STRING, _lazy_container))
+_LAZY_KEY = re.compile(r'"[^"\\\x00-\x1f]*"')
+# Smaller containers are decoded at once instead of getting a proxy.
+_LAZY_MIN_SIZE = 4096
+del _lazy_item, _lazy_container
+
+
+def _lazy_skip(s, pos):
+    """Return the end of the JSON value starting at ``pos`` (no decoding)."""
+    match = _LAZY_VALUE.match(s, pos)
+    if match is not None:
+        return match.end()
+    # Nested deeper than the regex goes (or malformed): walk this level.
+    char = s[pos:pos + 1]
+    if char not in ('[', '{'):
+        raise JSONDecodeError('Expecting value', s, pos)
+    return _lazy_scan(s, pos, None, None)
+
+
+def _lazy_scan(s, pos, keys, spans, strict=True):
+    """Scan the container at ``pos`` and return its end.
+
+    The start and end offsets of the values are appended to ``spans`` and,
+    for an object, the keys to ``keys``, unless they are ``None``.
+    """
+    obj = s[pos] == '{'
+    closer = '}' if obj else ']'
+    pos = _WS.match(s, pos + 1).end()
+    if s[pos:pos + 1] == closer:
+        return pos + 1
+    while True:
+        if obj:
+            match = _LAZY_KEY.match(s, pos)
+            if match is not None:
+                key = s[pos + 1:match.end() - 1]
+                pos = match.end()
+            elif s[pos:pos + 1] == '"':
+                key, pos = scanstring(s, pos + 1, strict)
+            else:
+                raise JSONDecodeError('Expecting property name enclosed in '
+                                      'double quotes', s, pos)
+            pos = _WS.match(s, pos).end()
+            if s[pos:pos + 1] != ':':
+                raise JSONDecodeError("Expecting ':' delimiter", s, pos)
+            pos = _WS.match(s, pos + 1).end()
+            if keys is not None:
+                keys.append(key)
+        end = _lazy_skip(s, pos)
+        if spans is not None:
+            spans.append(pos)
+            spans.append(end)
+        pos = _WS.match(s, end).end()
+        char = s[pos:pos + 1]
+        if char == closer:
+            return pos + 1
+        if char != ',':
+            raise JSONDecodeError("Expecting ',' delimiter", s, pos)
+        pos = _WS.match(s, pos + 1).end()
+
+
+class _LazyContainer:
+    """Common part of the lazy proxies.
+
+    ``_values`` caches what was decoded: scalars, or proxies for nested
+    containers (indexed on their first access).
+    """
+
+    __slots__ = ('_s', '_start', '_decoder', '_index', '_spans', '_values')
+
+    def __init__(self, s, start, decoder):
+        self._s = s
+        self._start = start
+        self._decoder = decoder
+        self._index = None
+        self._values = {}
+
+    def _indexed(self):
+        index = self._index
+        if index is None:
+            self._build()
+            index = self._index
+        return index
+
+    def _value_at(self, i):
+        s = self._s
+        start = self._spans[2 * i]
+        if self._spans[2 * i + 1] - start > _LAZY_MIN_SIZE:
+            char = s[start]
+            if char == '{':
+                return LazyObject(s, start, self._decoder)
+            if char == '[':
+                return LazyArray(s, start, self._decoder)
+        # Scalars, and containers too small for indexing to pay off.
+        return self._decoder.raw_decode(s, start)[0]
+
+    def materialize(self):
+        """Decode the whole container into plain ``dict``/``list`` values."""
+        return self._decoder.raw_decode(self._s, self._start)[0]
+
+
+class LazyObject(_LazyContainer, Mapping):
+    """Read-only mapping over a JSON object, decoding values on access.
+
+    The keys and value offsets are indexed on first use; each value is
+    decoded the first time it is read and cached.  Nested containers larger
+    than 4 KiB of text are ``LazyObject``/``LazyArray`` proxies themselves,
+    smaller ones plain ``dict``/``list``.  Duplicate keys resolve as for
+    ``loads`` (the last value wins).
+    """
+
+    __slots__ = ()
+
+    def _build(self):
+        keys = []
+        spans = []
+        end = _lazy_scan(self._s, self._start, keys, spans,
+                         self._decoder.strict)
+        self._spans = spans
+        self._index = {key: i for i, key in enumerate(keys)}
+        return end
+
+    def __getitem__(self, key):
         try:
-            import ujson
-            return ujson.dumps(obj)
-        except ImportError:
-            # Fall back to optimized standard library version
-            return dumps_optimized(obj, **kwargs)
+            return self._values[key]
+        except KeyError:
+            pass
+        value = self._values[key] = self._value_at(self._indexed()[key])
+        return value
+
+    def __contains__(self, key):
+        return key in self._indexed()
+
+    def __iter__(self):
+        return iter(self._indexed())
+
+    def __len__(self):
+        return len(self._indexed())
+
+    def __repr__(self):
+        return f'<LazyObject with {len(self)} keys>'
+
+
+class LazyArray(_LazyContainer, Sequence):
+    """Read-only sequence over a JSON array, decoding items on access.
+
+    The item offsets are indexed on first use; each item is decoded the
+    first time it is read and cached, nested containers as for
+    ``LazyObject``.  Slicing returns a ``list``.
+    """
+
+    __slots__ = ()
+
+    def _build(self):
+        spans = []
+        end = _lazy_scan(self._s, self._start, None, spans,
+                         self._decoder.strict)
+        self._spans = spans
+        self._values = [_MISSING] * (len(spans) // 2)
+        self._index = range(len(spans) // 2)
+        return end
+
+    def __getitem__(self, i):
+        index = self._indexed()
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(index)))]
+        value = self._values[i]
+        if value is _MISSING:
+            value = self._values[i] = self._value_at(index[i])
+        return value
+
+    def __len__(self):
+        return len(self._indexed())
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyArray)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'<LazyArray with {len(self)} items>'
+
+
+_MISSING = object()
+
+
+def _as_text(s):
+    """Return the JSON text of ``s`` with the ``loads`` input rules."""
+    if isinstance(s, str):
+        if s.startswith('\ufeff'):
+            raise JSONDecodeError("Unexpected UTF-8 BOM (decode using utf-8-sig)",
+                                  s, 0)
+        return s
+    if not isinstance(s, (bytes, bytearray)):
+        raise TypeError(f'the JSON object must be str, bytes or bytearray, '
+                        f'not {s.__class__.__name__}')
+    return s.decode(detect_encoding(s), 'surrogatepass')
+
+
+def loads_lazy(s, *, cls=None, parse_float=None, parse_int=None,
+               parse_constant=None, **kw):
+    """Deserialize ``s`` lazily: values are decoded when they are read.
+
+    ``s`` is a ``str``, ``bytes`` or ``bytearray`` as for ``loads``.  A
+    JSON object is returned as a read-only ``LazyObject`` (a ``Mapping``)
+    and an array as a ``LazyArray`` (a ``Sequence``); scalars are returned
+    as they are.  The structural scan that indexes a container skips the
+    nested values with a regex, without creating objects, and is only done
+    for the containers actually accessed.  ``materialize()`` decodes a
+    proxy fully.
+
+    Reading a few fields of a large document is therefore much cheaper in
+    time and memory than ``loads``.  The text is validated where it is
+    scanned or decoded; an error elsewhere is not reported.  The other
+    arguments are as for ``loads``; ``object_hook`` and
+    ``object_pairs_hook`` apply to whole objects and are not supported.
+    """
+    if 'object_hook' in kw or 'object_pairs_hook' in kw:
+        raise TypeError('loads_lazy() does not support object_hook or '
+                        'object_pairs_hook')
+    s = _as_text(s)
+    if (cls is None and parse_int is None and parse_float is None and
+            parse_constant is None and not kw):
+        decoder = _default_decoder
+    else:
+        decoder = _pooled_decoder(cls, None, parse_float, parse_int,
+                                  parse_constant, None, kw)
+    start = _WS.match(s).end()
+    char = s[start:start + 1]
+    if char == '{':
+        value = LazyObject(s, start, decoder)
+        end = value._build()
+    elif char == '[':
+        value = LazyArray(s, start, decoder)
+        end = value._build()
+    else:
+        value, end = decoder.raw_decode(s, start)
+    end = _WS.match(s, end).end()
+    if end != len(s):
+        raise JSONDecodeError('Extra data', s, end)
+    return value
+
+
+# --- Columnar decoding of record arrays ---
+
+_COLUMNAR_SPAN = 1 << 18      # characters of records decoded in one call
+_COLUMNAR_NEXT = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+# Where one record may end and the next start.  A match inside a string or
+# a nested array leaves text that doesn't decode as an array of records.
+_COLUMNAR_CUT = re.compile(r'\}[ \t\n\r]*,[ \t\n\r]*(?=\{)')
+
+
+class _Column:
+    """A column being built: typed storage plus a list of pending values.
+
+    ``kind`` is None (no value stored yet), 'int' (``array('q')``),
+    'float' (``array('d')``), 'str' (list of interned strings) or 'object'
+    (list).  Values are stored by batches, directly or through the
+    ``pending`` list, so type checks and conversions run at C speed.
+    """
+
+    __slots__ = ('kind', 'data', 'pending')
+
+    def __init__(self, missing=0, fill=None):
+        self.pending = []
+        if missing:
+            # Rows decoded before the key first appeared.
+            self.kind = 'object'
+            self.data = [fill] * missing
+        else:
+            self.kind = None
+            self.data = None
+
+    def flush(self):
+        if self.pending:
+            self.store(self.pending)
+            self.pending.clear()
+
+    def store(self, values):
+        """Append a sequence of decoded values to the storage."""
+        kind = self.kind
+        if kind != 'object':
+            types = set(map(type, values))
+            if types <= {int} and kind in (None, 'int'):
+                try:
+                    chunk = array('q', values)
+                except OverflowError:
+                    kind = 'object'
+                else:
+                    if kind is None:
+                        self.kind, self.data = 'int', chunk
+                    else:
+                        self.data.extend(chunk)
+                    return
+            elif types <= {int, float} and kind in (None, 'int', 'float'):
+                if kind != 'float':
+                    self.kind = 'float'
+                    self.data = array('d', self.data or ())
+                self.data.extend(array('d', values))
+                return
+            elif types <= {str} and kind in (None, 'str'):
+                if kind is None:
+                    self.kind, self.data = 'str', []
+                self.data.extend(map(sys.intern, values))
+                return
+            else:
+                kind = 'object'
+            if kind != self.kind:
+                self.kind = 'object'
+                data = self.data
+                self.data = ([] if data is None else
+                             data.tolist() if isinstance(data, array) else
+                             data)
+        self.data.extend(values)
+
+    def result(self, numpy):
+        self.flush()
+        data = self.data
+        if data is None:
+            return []
+        if numpy and self.kind in ('int', 'float'):
+            return _numpy.frombuffer(data, dtype=data.typecode)
+        return data
+
+
+class _Columns:
+    """The columns of a record array, filled by batches of decoded records.
+
+    A batch whose records all have exactly the keys of the columns is
+    transposed in C through an ``itemgetter``; any other record is added
+    on its own, creating columns for new keys and filling in ``missing``
+    for absent ones.
+    """
+
+    __slots__ = ('columns', 'order', 'column_list', 'pendings', 'getter',
+                 'rows', 'missing')
+
+    def __init__(self, missing):
+        self.columns = {}
+        self.order = ()         # keys of the columns, in order
+        self.column_list = []   # the columns, in the same order
+        self.pendings = []      # their pending lists, in the same order
+        self.getter = None      # itemgetter(*order)
+        self.rows = 0
+        self.missing = missing
+
+    def add(self, records):
+        if self.getter is None and records:
+            # The first record sets up the columns for the rest.
+            self.add_one(records[0])
+            records = records[1:]
+        getter = self.getter
+        if getter is not None:
+            try:
+                if set(map(len, records)) == {len(self.order)}:
+                    values = list(map(getter, records))
+                else:
+                    values = None
+            except (TypeError, KeyError, IndexError):
+                values = None   # not all dicts, or other keys
+            if values is not None:
+                self.flush()
+                if len(self.order) == 1:
+                    self.column_list[0].store(values)
+                else:
+                    any(map(_Column.store, self.column_list, zip(*values)))
+                self.rows += len(records)
+                return
+        for record in records:
+            self.add_one(record)
+
+    def add_one(self, record):
+        if record.__class__ is not dict:
+            raise ValueError(f'loads_columnar() expects an array of '
+                             f'objects, not of {type(record).__name__}')
+        columns = self.columns
+        if tuple(record) == self.order:
+            # list.append returns None, so any() consumes the map
+            any(map(list.append, self.pendings, record.values()))
+        else:
+            for key, value in record.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = _Column(self.rows, self.missing)
+                column.pending.append(value)
+            for key, column in columns.items():
+                if key not in record:
+                    column.pending.append(self.missing)
+            self.order = tuple(columns)
+            self.column_list = list(columns.values())
+            self.pendings = [column.pending for column in self.column_list]
+            self.getter = itemgetter(*self.order) if self.order else None
+        self.rows += 1
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+
+    def result(self, numpy):
+        return {key: column.result(numpy)
+                for key, column in self.columns.items()}
+
+
+def loads_columnar(s, *, numpy=False, missing=None, cls=None,
+                   parse_float=None, parse_int=None, parse_constant=None,
+                   **kw):
+    """Deserialize a JSON array of objects into a dict of columns.
+
+    ``s`` is a ``str``, ``bytes`` or ``bytearray`` as for ``loads`` and
+    must hold an array of objects (records).  The result maps every key,
+    in order of first appearance, to the column of its values, one per
+    record: an ``array('q')`` for integers, an ``array('d')`` for floats
+    (or a mix of integers and floats), a list of interned strings for
+    strings, and a plain list otherwise.  A key missing from a record gives
+    *missing* in that row (so the column is a list).  It defaults to
+    ``None``, the same as an explicit ``null``; pass a sentinel of your own
+    to tell the two apart.  With ``numpy=True`` the numeric columns are
+    NumPy arrays (sharing the ``array`` buffer).
+
+    The records are decoded in batches of about ``_COLUMNAR_SPAN``
+    characters by one C scanner call each, and every batch is pivoted into
+    the columns before the next is decoded, so only one batch of dicts
+    exists at a time.  Batch ends are found by a text search; a batch that
+    doesn't decode at the found end goes record by record instead, which
+    also reports syntax errors where they are.  The other arguments are as
+    for ``loads`` (without ``object_hook`` and ``object_pairs_hook``).
+    """
+    if 'object_hook' in kw or 'object_pairs_hook' in kw:
+        raise TypeError('loads_columnar() does not support object_hook or '
+                        'object_pairs_hook')
+    if numpy and _numpy is None:
+        raise ImportError('numpy=True requires NumPy')
+    s = _as_text(s)
+    if (cls is None and parse_int is None and parse_float is None and
+            parse_constant is None and not kw):
+        decoder = _default_decoder
+    else:
+        decoder = _pooled_decoder(cls, None, parse_float, parse_int,
+                                  parse_constant, None, kw)
+    scan_once = decoder.scan_once
+    ws = _WS.match
+    next_item = _COLUMNAR_NEXT.match
+    cut_after = _COLUMNAR_CUT.search
+
+    columns = _Columns(missing)
+    pos = ws(s).end()
+    if s[pos:pos + 1] != '[':
+        raise ValueError('loads_columnar() expects an array of objects')
+    pos = ws(s, pos + 1).end()
+    done = s[pos:pos + 1] == ']'
+    if done:
+        pos += 1
+    while not done:
+        cut = cut_after(s, pos + _COLUMNAR_SPAN)
+        if cut is None:
+            text = '[' + s[pos:]
+        else:
+            text = '[' + s[pos:cut.start() + 1] + ']'
+        try:
+            records, end = scan_once(text, 0)
+        except (StopIteration, JSONDecodeError):
+            records = None
+        if records is not None and (cut is None or end == len(text)):
+            columns.add(records)
+            if cut is None:
+                pos += end - 1
+                done = True
+            else:
+                pos = cut.end()
+        else:
+            # A false end or a syntax error: one record at a time up to
+            # the end of the batch.
+            while True:
+                try:
+                    record, pos = scan_once(s, pos)
+                except StopIteration as err:
+                    raise JSONDecodeError('Expecting value', s, err.value) \
+                        from None
+                columns.add_one(record)
+                match = next_item(s, pos)
+                if match is None:
+                    raise JSONDecodeError("Expecting ',' delimiter", s, pos)
+                pos = match.end()
+                if match.group(1) == ']':
+                    done = True
+                    break
+                if cut is not None and pos >= cut.end():
+                    break
+        records = None      # drop the batch of dicts before the next one
+        columns.flush()
+    if ws(s, pos).end() != len(s):
+        raise JSONDecodeError('Extra data', s, ws(s, pos).end())
+    return columns.result(numpy)
+
+
+# --- Pre-encoded string fragments ---
+
+class FragmentCache:
+    """Bounded cache of escaped JSON string fragments.
+
+    Maps a ``str`` to its quoted and escaped JSON form for one
+    ``ensure_ascii`` setting, so repeated dict keys and enum-like values
+    are escaped once.  Strings longer than ``max_length`` are escaped but
+    not stored; when ``max_entries`` is reached the oldest entry is dropped.
+    ``encode`` is the caching replacement for ``encode_basestring(_ascii)``.
+    """
+
+    def __init__(self, escape, max_entries=4096, max_length=64):
+        self.escape = escape
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self.hits = 0
+        self.misses = 0
+        self._fragments = {}
+        self._lock = threading.Lock()
+        self.encode = self._make_encode()
+
+    def _make_encode(self):
+        get = self._fragments.get
+        miss = self._miss
+
+        def encode(s):
+            fragment = get(s)
+            if fragment is None:
+                return miss(s)
+            self.hits += 1
+            return fragment
+        return encode
+
+    def _miss(self, s):
+        fragment = self.escape(s)
+        self.misses += 1
+        if len(s) <= self.max_length and self.max_entries > 0:
+            fragments = self._fragments
+            with self._lock:
+                if len(fragments) >= self.max_entries:
+                    del fragments[next(iter(fragments))]
+                fragments[s] = fragment
+        return fragment
+
+    def configure(self, *, max_entries=None, max_length=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+                fragments = self._fragments
+                while fragments and len(fragments) > max_entries:
+                    del fragments[next(iter(fragments))]
+            if max_length is not None:
+                self.max_length = max_length
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._fragments),
+            'max_entries': self.max_entries,
+            'max_length': self.max_length,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Separate caches: the escaped form depends on ensure_ascii.
+_fragment_caches = {
+    True: FragmentCache(encode_basestring_ascii),
+    False: FragmentCache(encode_basestring),
+}
+_cache_string_values = False
+
+
+def _string_encoders(ensure_ascii):
+    """Return ``(encode_key, encode_value)`` for the Python-level paths.
+
+    Keys always go through the fragment cache; string values only when
+    enabled with ``configure_fragment_cache(values=True)``.
+    """
+    cache = _fragment_caches[bool(ensure_ascii)]
+    if _cache_string_values:
+        return cache.encode, cache.encode
+    return cache.encode, cache.escape
+
+
+def configure_fragment_cache(*, max_entries=None, max_length=None,
+                             values=None):
+    """Configure the escaped-string caches used by the Python-level paths.
+
+    The C encoder escapes strings as fast as a cache lookup and is left
+    alone; the caches serve the walker behind ``memoize``/``specialize``,
+    the shape serializers, ``dump`` streaming and the pure-Python encoder.
+    ``values=True`` also caches short string values, not only keys.
+    """
+    global _cache_string_values
+    for cache in _fragment_caches.values():
+        cache.configure(max_entries=max_entries, max_length=max_length)
+    if values is not None and values != _cache_string_values:
+        _cache_string_values = values
+        # Compiled shape serializers captured the old value encoder.
+        with _shape_caches_lock:
+            _shape_caches.clear()
+
+
+def fragment_cache_stats():
+    """Return hit/miss statistics of the ``ensure_ascii`` on/off caches."""
+    return {'ascii': _fragment_caches[True].stats(),
+            'unicode': _fragment_caches[False].stats()}
+
+
+def fragment_cache_clear():
+    """Empty both escaped-string caches."""
+    for cache in _fragment_caches.values():
+        cache.clear()
+
+
+# --- Python-level encoder for the optional encoding modes ---
+
+def _make_floatstr(allow_nan):
+    """Return the ``floatstr`` helper ``JSONEncoder.iterencode`` builds."""
+    def floatstr(o, allow_nan=allow_nan,
+            _repr=float.__repr__, _inf=INFINITY, _neginf=-INFINITY):
+        if o != o:
+            text = 'NaN'
+        elif o == _inf:
+            text = 'Infinity'
+        elif o == _neginf:
+            text = '-Infinity'
+        else:
+            return _repr(o)
+
+        if not allow_nan:
+            raise ValueError(
+                "Out of range float values are not JSON compliant: " +
+                repr(o))
+
+        return text
+    return floatstr
+
+
+_floatstr_nan = _make_floatstr(True)
+_floatstr_strict = _make_floatstr(False)
+
+
+def _uses_c_encoder(encoder):
+    """Whether ``encoder.encode`` runs on the C accelerator."""
+    return c_make_encoder is not None and encoder.indent is None
+
+
+def _make_subtree_encoder(encoder, markers):
+    """Return ``(encode_subtree, encode_str, floatstr)`` for ``encoder``.
+
+    ``encode_subtree(o, level)`` encodes a whole value exactly like
+    ``encoder.encode`` would at indent level ``level``, using the C encoder
+    when the options allow it, the same way ``JSONEncoder.iterencode`` does.
+    """
+    if encoder.ensure_ascii:
+        _encoder = encode_basestring_ascii
+    else:
+        _encoder = encode_basestring
+    floatstr = _make_floatstr(encoder.allow_nan)
+
+    if _uses_c_encoder(encoder):
+        _iterencode = c_make_encoder(
+            markers, encoder.default, _encoder, encoder.indent,
+            encoder.key_separator, encoder.item_separator, encoder.sort_keys,
+            encoder.skipkeys, encoder.allow_nan)
+    else:
+        # The pure-Python encoder escapes keys and values with the same
+        # function, so the fragment cache is only used if values may be.
+        _iterencode = _make_iterencode(
+            markers, encoder.default,
+            _string_encoders(encoder.ensure_ascii)[1], encoder.indent,
+            floatstr,
+            encoder.key_separator, encoder.item_separator, encoder.sort_keys,
+            encoder.skipkeys, True)
+
+    def encode_subtree(o, level, _join=''.join):
+        return _join(_iterencode(o, level))
+
+    return encode_subtree, _encoder, floatstr
+
+
+def _find_shared(obj):
+    """Count container references reachable from ``obj``.
+
+    Returns ``(shared, walk)``: the ids of containers reached more than
+    once, and the ids of containers that have a shared container somewhere
+    below them.  Containers in neither set can be encoded in one piece.
+    A cycle shows up as a shared container, so it is walked and reported.
+    """
+    counts = {}
+    parents = {}
+    walk = set()
+
+    def mark(pid):
+        while pid is not None and pid not in walk:
+            walk.add(pid)
+            pid = parents[pid]
+
+    def visit(o, pid):
+        oid = id(o)
+        n = counts.get(oid)
+        if n is not None:
+            counts[oid] = n + 1
+            if n == 1:
+                mark(parents[oid])
+            mark(pid)
+            return
+        counts[oid] = 1
+        parents[oid] = pid
+        for value in (o.values() if isinstance(o, dict) else o):
+            if isinstance(value, (list, tuple, dict)):
+                visit(value, oid)
+
+    visit(obj, None)
+    shared = {oid for oid, n in counts.items() if n > 1}
+    return shared, walk
+
+
+def _make_walker(encoder, markers, *, walk=None, shared=(), shapes=None,
+                 incremental=False, objects=None, namedtuples=None):
+    """Return ``encode(o, level)``, a Python-level version of ``encoder``.
+
+    Containers whose id is not in ``walk`` are handed to the stdlib encoder
+    in one piece (``walk=None`` walks everything in Python).  Fragments of
+    containers in ``shared`` are memoized for the rest of the call, and
+    dicts matching a learned shape in ``shapes`` use its specialized
+    serializer.  Long lists of plain numbers, and numeric arrays when the
+    encoder uses ``_extended_default``, are joined in bulk.  With
+    ``incremental``, tracked containers reuse the text kept from the last
+    call and only encode their stale items.  Dataclasses, ``__slots__``
+    objects and enums are written with the class serializers of the
+    ``_ShapeCache`` ``objects``, and namedtuples with those of
+    ``namedtuples``.  Otherwise the output is identical to
+    ``encoder.encode(o)``.
+    """
+    encode_subtree, _, _floatstr = _make_subtree_encoder(encoder, markers)
+    _key_encoder, _encoder = _string_encoders(encoder.ensure_ascii)
+    _indent = encoder.indent
+    if _indent is not None and not isinstance(_indent, str):
+        _indent = ' ' * _indent
+    _key_separator = encoder.key_separator
+    _item_separator = encoder.item_separator
+    _sort_keys = encoder.sort_keys
+    _skipkeys = encoder.skipkeys
+    _intstr = int.__repr__
+    _numeric = encoder.default is _extended_default
+    _ensure_ascii = encoder.ensure_ascii
+    memo = {}
+
+    def encode_value(value, level):
+        if isinstance(value, str):
+            return _encoder(value)
+        elif value is None:
+            return 'null'
+        elif value is True:
+            return 'true'
+        elif value is False:
+            return 'false'
+        elif isinstance(value, int):
+            return _intstr(value)
+        elif isinstance(value, float):
+            return _floatstr(value)
+        elif isinstance(value, (list, tuple, dict)):
+            if namedtuples is not None and hasattr(value, '_fields'):
+                serializer = namedtuples.get_object(value)
+                if serializer is not None:
+                    return encode_object(value, level, serializer)
+            return encode_container(value, level)
+        elif isinstance(value, RawJSON):
+            return value._encoded(_ensure_ascii)
+        elif _numeric and isinstance(value, _NUMERIC_CONTAINERS):
+            values = _numeric_list(value)
+            if values is not None:
+                return encode_list(values, level)
+        if objects is not None:
+            serializer = objects.get_object(value)
+            if serializer is not None:
+                return encode_object(value, level, serializer)
+        return encode_subtree(value, level)
+
+    def encode_object(o, level, serializer):
+        if markers is not None:
+            oid = id(o)
+            if oid in markers:
+                raise ValueError("Circular reference detected")
+            markers[oid] = o
+        text = serializer(o, level, encode_value)
+        if markers is not None:
+            del markers[oid]
+        return text
+
+    if objects is not None:
+        # Object graphs are mostly objects below the top level: try the
+        # class serializers before the type checks.
+        encode_plain = encode_value
+        serializers = objects._objects
+
+        def encode_value(value, level):
+            serializer = serializers.get(value.__class__)
+            if serializer is None:
+                if value.__class__ is list:
+                    return encode_container(value, level)
+                return encode_plain(value, level)
+            if markers is None:
+                return serializer(value, level, encode_value)
+            oid = id(value)
+            if oid in markers:
+                raise ValueError("Circular reference detected")
+            markers[oid] = value
+            text = serializer(value, level, encode_value)
+            del markers[oid]
+            return text
+
+    def encode_container(o, level):
+        if incremental and isinstance(o, _Tracked):
+            tracked_key = encoder if _indent is None else (encoder, level)
+            if o._text is not None and o._key == tracked_key:
+                return o._text
+        oid = id(o)
+        if shared:
+            # An indented fragment depends on the depth it is written at.
+            key = oid if _indent is None else (oid, level)
+            fragment = memo.get(key)
+            if fragment is not None:
+                return fragment
+        if walk is not None and oid not in walk:
+            fragment = encode_subtree(o, level)
+        else:
+            if markers is not None:
+                if oid in markers:
+                    raise ValueError("Circular reference detected")
+                markers[oid] = o
+            if incremental and isinstance(o, _Tracked):
+                fragment = encode_tracked(o, level, tracked_key)
+            elif isinstance(o, dict):
+                fragment = encode_dict(o, level)
+            else:
+                fragment = encode_list(o, level)
+            if markers is not None:
+                del markers[oid]
+        if shared and oid in shared:
+            memo[key] = fragment
+        return fragment
+
+    def encode_list(lst, level):
+        if not lst:
+            return '[]'
+        if _indent is not None:
+            level += 1
+            newline_indent = '\n' + _indent * level
+            separator = _item_separator + newline_indent
+        else:
+            newline_indent = None
+            separator = _item_separator
+        text = None
+        if len(lst) >= _NUMERIC_MIN_LENGTH:
+            text = _encode_numbers(lst, separator, _floatstr)
+        if text is None:
+            text = separator.join([encode_value(value, level)
+                                   for value in lst])
+        if newline_indent is not None:
+            return ('[' + newline_indent + text
+                    + '\n' + _indent * (level - 1) + ']')
+        return '[' + text + ']'
+
+    def encode_dict(dct, level):
+        if not dct:
+            return '{}'
+        if shapes is not None:
+            serializer = shapes.get(dct)
+            if serializer is not None:
+                return serializer(dct, level, encode_container)
+        if _indent is not None:
+            level += 1
+            newline_indent = '\n' + _indent * level
+            item_separator = _item_separator + newline_indent
+            parts = ['{', newline_indent]
+        else:
+            newline_indent = None
+            item_separator = _item_separator
+            parts = ['{']
+        append = parts.append
+        first = True
+        if _sort_keys:
+            items = sorted(dct.items())
+        else:
+            items = dct.items()
+        for key, value in items:
+            if isinstance(key, str):
+                pass
+            elif isinstance(key, float):
+                key = _floatstr(key)
+            elif key is True:
+                key = 'true'
+            elif key is False:
+                key = 'false'
+            elif key is None:
+                key = 'null'
+            elif isinstance(key, int):
+                key = _intstr(key)
+            elif _skipkeys:
+                continue
+            else:
+                raise TypeError(f'keys must be str, int, float, bool or None, '
+                                f'not {key.__class__.__name__}')
+            if first:
+                first = False
+            else:
+                append(item_separator)
+            append(_key_encoder(key))
+            append(_key_separator)
+            append(encode_value(value, level))
+        if newline_indent is not None:
+            append('\n' + _indent * (level - 1))
+        append('}')
+        return ''.join(parts)
+
+    def encode_tracked(o, level, key):
+        parts = o._parts
+        if parts is None or o._key != key:
+            build_tracked(o, level)
+            parts = o._parts
+        elif o._stale:
+            if _indent is not None:
+                level += 1
+            if isinstance(o, dict):
+                slots = o._slots
+                for position in o._stale:
+                    i = slots.get(position)
+                    if i is not None:   # None: a key skipped by skipkeys
+                        parts[i] = encode_value(
+                            dict.__getitem__(o, position), level)
+            else:
+                for position in o._stale:
+                    parts[1 + 2 * position] = encode_value(
+                        list.__getitem__(o, position), level)
+        o._stale = None
+        o._key = key
+        text = o._text = ''.join(parts)
+        return text
+
+    def build_tracked(o, level):
+        # parts is [opener, item, separator, item, ..., closer], where a
+        # dict item is its key fragment followed by its value.
+        if _indent is not None:
+            level += 1
+            opener = '\n' + _indent * level
+            separator = _item_separator + opener
+            closer = '\n' + _indent * (level - 1)
+        else:
+            opener = closer = ''
+            separator = _item_separator
+        children = {}
+        if isinstance(o, dict):
+            slots = {}
+            if not o:
+                parts = ['{}']
+            else:
+                parts = ['{' + opener]
+                append = parts.append
+                if _sort_keys:
+                    items = sorted(o.items())
+                else:
+                    items = o.items()
+                prefix = ''
+                for key, value in items:
+                    text = _convert_key(key, _floatstr, _skipkeys)
+                    if text is None:
+                        continue
+                    append(prefix + _key_encoder(text) + _key_separator)
+                    slots[key] = len(parts)
+                    append(encode_value(value, level))
+                    if isinstance(value, _CONTAINER_TYPES):
+                        _link_children(children, key, value)
+                    prefix = separator
+                parts.append(closer + '}')
+            o._slots = slots
+        else:
+            if not o:
+                parts = ['[]']
+            else:
+                parts = ['[' + opener]
+                append = parts.append
+                for i, value in enumerate(o):
+                    if i:
+                        append(separator)
+                    append(encode_value(value, level))
+                    if isinstance(value, _CONTAINER_TYPES):
+                        _link_children(children, i, value)
+                append(closer + ']')
+        o._parts = parts
+        o._children = children or None
+
+    return encode_value
+
+
+# --- Buffered streaming output for dump() ---
+
+def _write_all_fd(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _write_all_raw(raw, data):
+    view = memoryview(data)
+    while view:
+        written = raw.write(view)
+        if written is None:
+            raise BlockingIOError(
+                'raw stream is non-blocking and not ready for writing')
+        view = view[written:]
+
+
+def _stream_writer(fp):
+    """Return a callable writing one whole buffer to ``fp``."""
+    if isinstance(fp, int):
+        return lambda data: _write_all_fd(fp, data)
+    if isinstance(fp, io.RawIOBase):
+        return lambda data: _write_all_raw(fp, data)
+    return fp.write
+
+
+def _write_buffered(chunks, write, binary, buffer_size):
+    """Coalesce ``chunks`` into writes of about ``buffer_size``."""
+    pending = []
+    pending_size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= buffer_size:
+            data = ''.join(pending)
+            write(data.encode('utf-8') if binary else data)
+            pending.clear()
+            pending_size = 0
+    if pending:
+        data = ''.join(pending)
+        write(data.encode('utf-8') if binary else data)
+
+
+def _raw_chunks(chunks, ensure_ascii):
+    """Pass ``chunks`` through with their ``RawJSON`` placeholders replaced.
+
+    A placeholder is always a whole string token, so it never straddles
+    two chunks.
+    """
+    pending = _raw_state.pending
+    try:
+        for chunk in chunks:
+            if _raw_state.pending != pending:
+                chunk = _substitute_raw(chunk, ensure_ascii)
+            yield chunk
+    finally:
+        # All replaced by now, unless encoding failed or was abandoned
+        _raw_state.pending = pending
+
+
+def _convert_key(key, floatstr, skipkeys):
+    """Return the JSON text of a dict key, or ``None`` to skip it."""
+    if isinstance(key, str):
+        return key
+    elif isinstance(key, float):
+        return floatstr(key)
+    elif key is True:
+        return 'true'
+    elif key is False:
+        return 'false'
+    elif key is None:
+        return 'null'
+    elif isinstance(key, int):
+        return int.__repr__(key)
+    elif skipkeys:
+        return None
+    raise TypeError(f'keys must be str, int, float, bool or None, '
+                    f'not {key.__class__.__name__}')
+
+
+def _iterencode_stream(encoder, obj, split_length=None):
+    """Yield the JSON text of ``obj`` one top-level item at a time.
+
+    Each item of a top-level array or object is encoded by one C-encoder
+    call, which is much faster than the token-by-token pure-Python
+    ``iterencode`` while keeping memory bounded by the largest item.  With
+    ``split_length``, items that are containers of at least that many
+    items are streamed the same way, and the other items are encoded in
+    runs of up to ``split_length`` per call.  Falls back to
+    ``encoder.iterencode`` when the C encoder cannot be used or
+    ``iterencode`` is overridden.
+    """
+    if (type(encoder).iterencode is not JSONEncoder.iterencode
+            or not _uses_c_encoder(encoder)
+            or not isinstance(obj, (list, tuple, dict)) or not obj):
+        yield from encoder.iterencode(obj)
+        return
+    markers = {} if encoder.check_circular else None
+    encode_subtree, _, floatstr = _make_subtree_encoder(encoder, markers)
+    _key_encoder = _string_encoders(encoder.ensure_ascii)[0]
+    item_separator = encoder.item_separator
+    key_separator = encoder.key_separator
+    skipkeys = encoder.skipkeys
+    sort_keys = encoder.sort_keys
+    if split_length is None:
+        run_length = 1
+    else:
+        split_length = run_length = max(split_length, 1)
+
+    def split(value):
+        return (split_length is not None
+                and isinstance(value, (list, tuple, dict))
+                and len(value) >= split_length)
+
+    def stream(o):
+        if markers is not None:
+            if id(o) in markers:
+                raise ValueError("Circular reference detected")
+            markers[id(o)] = o
+        separator = ''
+        run = []
+        if isinstance(o, dict):
+            yield '{'
+            items = sorted(o.items()) if sort_keys else o.items()
+            for key, value in items:
+                if run_length > 1 and not split(value):
+                    run.append((key, value))
+                    if len(run) < run_length:
+                        continue
+                    # Members of a run keep their order: the C encoder
+                    # sorts them the same way when sort_keys is set.
+                    text = encode_subtree(dict(run), 0)[1:-1]
+                    run.clear()
+                    if text:
+                        yield separator + text
+                        separator = item_separator
+                    continue
+                if run:
+                    text = encode_subtree(dict(run), 0)[1:-1]
+                    run.clear()
+                    if text:
+                        yield separator + text
+                        separator = item_separator
+                key = _convert_key(key, floatstr, skipkeys)
+                if key is None:
+                    continue
+                prefix = separator + _key_encoder(key) + key_separator
+                separator = item_separator
+                if split(value):
+                    yield prefix
+                    yield from stream(value)
+                else:
+                    yield prefix + encode_subtree(value, 0)
+            if run:
+                text = encode_subtree(dict(run), 0)[1:-1]
+                if text:
+                    yield separator + text
+            yield '}'
+        else:
+            yield '['
+            for value in o:
+                if run_length > 1 and not split(value):
+                    run.append(value)
+                    if len(run) < run_length:
+                        continue
+                    yield separator + encode_subtree(run, 0)[1:-1]
+                    separator = item_separator
+                    run.clear()
+                    continue
+                if run:
+                    yield separator + encode_subtree(run, 0)[1:-1]
+                    separator = item_separator
+                    run.clear()
+                if split(value):
+                    if separator:
+                        yield separator
+                    yield from stream(value)
+                else:
+                    yield separator + encode_subtree(value, 0)
+                separator = item_separator
+            if run:
+                yield separator + encode_subtree(run, 0)[1:-1]
+            yield ']'
+        if markers is not None:
+            del markers[id(o)]
+
+    yield from stream(obj)
+
+
+# --- Shape-specialized dict serializers ---
+
+_SHAPE_MIN_SIGHTINGS = 2    # compile a shape the second time it is seen
+_SHAPE_MAX_KEYS = 64
+_SHAPE_MAX_SHAPES = 512
+
+
+class _ShapeCache:
+    """Learned dict shapes and their serializers for one set of options.
+
+    A shape is the ordered key tuple of a dict plus the exact type of each
+    value.  Once a shape has been seen ``_SHAPE_MIN_SIGHTINGS`` times a
+    serializer is generated for it: key fragments (``"key1": ``) are escaped
+    once at compile time and each value is encoded by the one branch its
+    type needs.  Dicts of any other shape take the generic path.
+    """
+
+    # How each exact value type is written; '{v}' is the value, '{lvl}' the
+    # indent level of the dict's items.
+    _VALUE_CODE = {
+        str: '_e({v})',
+        int: '_i({v})',
+        float: '_f({v})',
+        bool: "('true' if {v} else 'false')",
+        type(None): "'null'",
+        dict: '_c({v}, {lvl})',
+        list: '_c({v}, {lvl})',
+        tuple: '_c({v}, {lvl})',
+    }
+
+    # Object fields are not typed; the type seen first gets an inline branch.
+    _GUARDED_CODE = {
+        str: '(_e({v}) if {v}.__class__ is str else _c({v}, {lvl}))',
+        int: '(_i({v}) if {v}.__class__ is int else _c({v}, {lvl}))',
+        # x - x is 0.0 only for finite floats; nan and inf go through _c.
+        float: ('(_r({v}) if {v}.__class__ is float and {v} - {v} == 0.0'
+                ' else _c({v}, {lvl}))'),
+        bool: ("('true' if {v} is True else 'false' if {v} is False"
+               " else _c({v}, {lvl}))"),
+        type(None): "('null' if {v} is None else _c({v}, {lvl}))",
+    }
+
+    def __init__(self, encoder):
+        self._encoder = _string_encoders(encoder.ensure_ascii)[1]
+        self._floatstr = _make_floatstr(encoder.allow_nan)
+        indent = encoder.indent
+        if indent is not None and not isinstance(indent, str):
+            indent = ' ' * indent
+        self._indent = indent
+        self._key_separator = encoder.key_separator
+        self._item_separator = encoder.item_separator
+        self._sort_keys = encoder.sort_keys
+        self._serializers = {}   # shape -> serializer, or None if unsupported
+        self._sightings = {}
+        self._objects = {}       # class -> serializer, or None if unsupported
+        self._namedtuples = {}
+        self._lock = threading.Lock()
+
+    def get(self, dct):
+        """Return the serializer for the shape of ``dct``, or ``None``."""
+        shape = (tuple(dct), tuple(map(type, dct.values())))
+        try:
+            return self._serializers[shape]
+        except KeyError:
+            return self._learn(shape)
+
+    def _learn(self, shape):
+        with self._lock:
+            if shape in self._serializers:
+                return self._serializers[shape]
+            seen = self._sightings.get(shape, 0) + 1
+            if seen < _SHAPE_MIN_SIGHTINGS:
+                if len(self._sightings) < _SHAPE_MAX_SHAPES:
+                    self._sightings[shape] = seen
+                return None
+            self._sightings.pop(shape, None)
+            if len(self._serializers) >= _SHAPE_MAX_SHAPES:
+                return None
+            serializer = self._compile(*shape)
+            self._serializers[shape] = serializer
+            return serializer
+
+    def get_object(self, o):
+        """Return the serializer for objects of ``o``'s class, or ``None``."""
+        serializers = (self._namedtuples if isinstance(o, tuple)
+                       else self._objects)
+        try:
+            return serializers[o.__class__]
+        except KeyError:
+            return self._learn_object(o, serializers)
+
+    def _learn_object(self, o, serializers):
+        with self._lock:
+            cls = o.__class__
+            if cls in serializers:
+                return serializers[cls]
+            serializer = self._compile_object(o)
+            if len(serializers) < _SHAPE_MAX_SHAPES:
+                serializers[cls] = serializer
+            return serializer
+
+    def _compile(self, keys, types):
+        if len(keys) > _SHAPE_MAX_KEYS:
+            return None
+        value_code = self._VALUE_CODE
+        for key, tp in zip(keys, types):
+            if type(key) is not str or tp not in value_code:
+                return None
+        names = [f'v{i}' for i in range(len(keys))]
+        if len(names) == 1:
+            setup = [f'    {names[0]}, = d.values()']
+        else:
+            setup = [f'    {", ".join(names)} = d.values()']
+        return self._generate(keys, [value_code[tp] for tp in types], setup)
+
+    def _compile_object(self, o):
+        if isinstance(o, Enum):
+            return _make_enum_serializer()
+        fields = _object_fields(o.__class__)
+        if fields is None or len(fields) > _SHAPE_MAX_KEYS:
+            return None
+        if not fields:
+            return _serialize_empty
+        names = [f'v{i}' for i in range(len(fields))]
+        if isinstance(o, tuple):
+            values = o
+            setup = [f'    {", ".join(names)}, = d']
+        else:
+            values = [getattr(o, attr, None) for _, attr in fields]
+            setup = ['    try:']
+            setup += [f'        {name} = d.{attr}'
+                      for name, (_, attr) in zip(names, fields)]
+            setup += ['    except AttributeError:',
+                      '        return _c(_set_attributes(d, _fields), level)']
+        # Guess each field's type from the first object; the guard keeps
+        # other values correct.
+        guarded = self._GUARDED_CODE
+        codes = [guarded.get(type(value), '_c({v}, {lvl})') for value in values]
+        return self._generate([key for key, _ in fields], codes, setup,
+                              _fields=fields, _set_attributes=_set_attributes)
+
+    def _generate(self, keys, codes, setup, **namespace):
+        """Build ``serialize(d, level, _c)`` writing an object of ``keys``.
+
+        ``setup`` binds the value of ``keys[i]`` to ``v<i>`` and ``codes[i]``
+        is the expression that encodes it.
+        """
+        order = range(len(keys))
+        if self._sort_keys:
+            order = sorted(order, key=keys.__getitem__)
+
+        if self._indent is None:
+            lvl = 'level'
+            opener = repr('{')
+            separator = repr(self._item_separator)
+            closer = repr('}')
+        else:
+            lvl = 'level + 1'
+            opener = "'{' + nl"
+            separator = repr(self._item_separator) + ' + nl'
+            closer = "'\\n' + _ind * level + '}'"
+        pieces = [opener]
+        for n, i in enumerate(order):
+            key_fragment = self._encoder(keys[i]) + self._key_separator
+            if n:
+                pieces.append(separator)
+            pieces.append(repr(key_fragment))
+            pieces.append(codes[i].format(v=f'v{i}', lvl=lvl))
+        pieces.append(closer)
+
+        lines = ['def serialize(d, level, _c):', *setup]
+        if self._indent is not None:
+            lines.append("    nl = '\\n' + _ind * (level + 1)")
+        lines.append('    return ' + ' + '.join(pieces))
+        namespace.update(_e=self._encoder, _i=int.__repr__, _r=float.__repr__,
+                         _f=self._floatstr, _ind=self._indent)
+        exec('\n'.join(lines), namespace)
+        return namespace['serialize']
+
+
+def _object_fields(cls):
+    """Return ``[(key, attribute), ...]`` for writing ``cls`` as an object.
+
+    Dataclasses give their fields, namedtuples their ``_fields`` and classes
+    whose instances only have ``__slots__`` (no ``__dict__``) their slots.
+    ``None`` for any other class.
+    """
+    if dataclasses.is_dataclass(cls):
+        fields = [(field.name, field.name) for field in dataclasses.fields(cls)]
+    elif issubclass(cls, tuple):
+        names = getattr(cls, '_fields', None)
+        if not isinstance(names, tuple):
+            return None
+        fields = [(name, name) for name in names]
+    else:
+        fields = []
+        for base in reversed(cls.__mro__[:-1]):
+            slots = base.__dict__.get('__slots__')
+            if slots is None:
+                return None
+            if isinstance(slots, str):
+                slots = (slots,)
+            for name in slots:
+                if name == '__dict__':
+                    return None
+                if name == '__weakref__' or any(key == name for key, _ in fields):
+                    continue
+                attr = name
+                if name.startswith('__') and not name.endswith('__'):
+                    attr = f'_{base.__name__.lstrip("_")}{name}'
+                fields.append((name, attr))
+        if not fields:
+            return None
+    for key, attr in fields:
+        if (not isinstance(key, str) or not attr.isidentifier()
+                or keyword.iskeyword(attr)):
+            return None
+    return fields
+
+
+def _set_attributes(o, fields):
+    """``o``'s fields as a dict, leaving out unset slots."""
+    values = {}
+    for key, attr in fields:
+        value = getattr(o, attr, _MISSING)
+        if value is not _MISSING:
+            values[key] = value
+    return values
+
+
+def _make_enum_serializer():
+    """Serializer for the members of one ``Enum`` class.
+
+    Members live as long as their class, so the text of a member whose
+    value is a plain scalar is kept by ``id()`` after its first use.
+    """
+    texts = {}
+
+    def serialize(o, level, _c):
+        entry = texts.get(id(o))
+        if entry is not None and entry[0] is o:
+            return entry[1]
+        value = o.value
+        text = _c(value, level)
+        if value.__class__ in _SCALAR_TYPES:
+            texts[id(o)] = (o, text)
+        return text
+
+    return serialize
+
+
+_SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+
+
+def _serialize_empty(o, level, _c):
+    return '{}'
+
+
+_shape_caches = {}
+_shape_caches_lock = threading.Lock()
+
+
+def _shape_cache_for(encoder):
+    """Return the shared ``_ShapeCache`` for ``encoder``'s options."""
+    key = (encoder.ensure_ascii, encoder.allow_nan, encoder.indent,
+           encoder.key_separator, encoder.item_separator, encoder.sort_keys)
+    cache = _shape_caches.get(key)
+    if cache is None:
+        with _shape_caches_lock:
+            cache = _shape_caches.get(key)
+            if cache is None:
+                if len(_shape_caches) >= 64:
+                    _shape_caches.clear()
+                cache = _shape_caches[key] = _ShapeCache(encoder)
+    return cache
+
+
+def _encode_walked(encoder, obj, *, memoize=False, specialize=False,
+                   numeric=False, incremental=False, objects=False,
+                   namedtuple_as_object=False):
+    """Encode ``obj`` with the Python-level walker where it pays off.
+
+    ``memoize`` encodes each container referenced more than once a single
+    time.  ``specialize`` uses shape-specialized dict serializers; they beat
+    the pure-Python encoder but not the C one, so they are only used when
+    ``encoder`` would not run on the C accelerator (e.g. with ``indent``).
+    ``numeric`` walks ``obj`` in Python just for the bulk joining of long
+    number sequences; callers only ask for it off the C accelerator too.
+    ``incremental`` walks everything so that tracked containers can reuse
+    and keep their text.  ``objects`` and ``namedtuple_as_object`` walk
+    everything and write those objects with compiled per-class serializers
+    instead of calling ``encoder.default``.  Otherwise the output is
+    identical to ``encoder.encode(obj)``.
+    """
+    classes = None
+    if objects or namedtuple_as_object:
+        classes = _shape_cache_for(encoder)
+    elif not isinstance(obj, (list, tuple, dict)):
+        return encoder.encode(obj)
+    shapes = None
+    if specialize and not _uses_c_encoder(encoder):
+        shapes = _shape_cache_for(encoder)
+    shared = ()
+    walk = None
+    if memoize:
+        shared, walk = _find_shared(obj)
+        if (not shared and shapes is None and not incremental
+                and classes is None):
+            # No container is reached twice, so none is part of a cycle;
+            # only objects returned by a user default() could still form
+            # one, and the built-in one only returns fresh lists of numbers.
+            if encoder.check_circular and encoder.default is _extended_default:
+                return _unchecked_encoder(encoder).encode(obj)
+            return encoder.encode(obj)
+        if shapes is not None or incremental or classes is not None:
+            # Shapes are faster than the subtree encoder on this path, a
+            # tracked container must see its children encoded to keep their
+            # text too, and the subtree encoder knows no class serializers.
+            walk = None
+    elif (shapes is None and not numeric and not incremental
+            and classes is None):
+        return encoder.encode(obj)
+
+    markers = {} if encoder.check_circular else None
+    encode = _make_walker(encoder, markers, walk=walk, shared=shared,
+                          shapes=shapes, incremental=incremental,
+                          objects=classes if objects else None,
+                          namedtuples=classes if namedtuple_as_object else None)
+    return encode(obj, 0)
+
+
+# --- Dirty-tracked containers for incremental dumps ---
+
+class _Tracked:
+    """Bookkeeping shared by ``TrackedDict`` and ``TrackedList``.
+
+    ``_parents`` holds every tracked container this one is a value of (once
+    per reference).  ``_key`` names the options and indent level ``_text``
+    and ``_parts`` were encoded with; ``_parts`` is the text split so that
+    each value is one item, ``_stale`` the positions (dict keys or list
+    indices) whose item must be encoded again and ``_children`` maps
+    ``id()`` of tracked values to their positions.  ``_text`` is ``None``
+    once anything below has changed, and ``_parts`` is ``None`` once the
+    container itself changed shape.
+    """
+
+    __slots__ = ()
+
+    def _init_tracking(self):
+        self._parents = []
+        self._key = None
+        self._text = None
+        self._parts = None
+        self._stale = None
+        self._children = None
+
+    def _replaced(self, position, old, new):
+        """Record that the value at ``position`` went from ``old`` to ``new``."""
+        if (self._parts is not None and not isinstance(old, _CONTAINER_TYPES)
+                and not isinstance(new, _CONTAINER_TYPES)):
+            self._mark_stale(position)
+        else:
+            self._parts = None
+        _mark_changed(self)
+
+    def _reshaped(self):
+        """Record a change of keys, length or order."""
+        self._parts = None
+        _mark_changed(self)
+
+    def _mark_stale(self, position):
+        if self._stale is None:
+            self._stale = {position}
+        else:
+            self._stale.add(position)
+
+
+_CONTAINER_TYPES = (dict, list, tuple)
+
+
+def _mark_changed(node):
+    """Drop the text of ``node`` and of every tracked container above it.
+
+    Each parent also marks the positions holding the changed child as
+    stale, so it only encodes those items again.  Stops at containers whose
+    text is already dropped: their ancestors were told then.
+    """
+    if node._text is None:
+        return
+    node._text = None
+    todo = [node]
+    while todo:
+        child = todo.pop()
+        for parent in child._parents:
+            if parent._parts is not None:
+                children = parent._children
+                positions = children.get(id(child)) if children else None
+                if positions is None:
+                    parent._parts = None
+                else:
+                    for position in positions:
+                        parent._mark_stale(position)
+            if parent._text is not None:
+                parent._text = None
+                todo.append(parent)
+
+
+def _adopt(value, parent):
+    """Return ``value`` as stored in ``parent``, linked to it.
+
+    Plain dicts and lists are copied into tracked containers and tuples
+    are rebuilt with their items adopted, so that everything mutable below
+    a tracked container reports its changes.
+    """
+    if isinstance(value, _Tracked):
+        value._parents.append(parent)
+    elif isinstance(value, dict):
+        value = TrackedDict(value)
+        value._parents.append(parent)
+    elif isinstance(value, list):
+        value = TrackedList(value)
+        value._parents.append(parent)
+    elif value.__class__ is tuple:
+        value = tuple([_adopt(item, parent) for item in value])
+    return value
+
+
+def _release(value, parent):
+    """Undo one ``_adopt(value, parent)`` link."""
+    if isinstance(value, _Tracked):
+        parents = value._parents
+        for i, linked in enumerate(parents):
+            if linked is parent:
+                del parents[i]
+                break
+    elif value.__class__ is tuple:
+        for item in value:
+            _release(item, parent)
+
+
+def _link_children(children, position, value):
+    """Record the tracked containers in ``value`` as held at ``position``."""
+    if isinstance(value, _Tracked):
+        children.setdefault(id(value), []).append(position)
+    elif value.__class__ is tuple:
+        for item in value:
+            _link_children(children, position, item)
+
+
+class TrackedDict(_Tracked, dict):
+    """A ``dict`` that records which of its values changed.
+
+    Used with ``dumps(obj, incremental=True)``, which keeps the text of
+    each tracked container between calls and only encodes again what was
+    changed since.  Dicts and lists stored in it are copied into tracked
+    containers; other values are treated as immutable.
+    """
+
+    __slots__ = ('_parents', '_key', '_text', '_parts', '_stale', '_slots',
+                 '_children')
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self)
+        self._init_tracking()
+        self._slots = None
+        if args or kwargs:
+            self.update(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        old = dict.get(self, key, _MISSING)
+        value = _adopt(value, self)
+        dict.__setitem__(self, key, value)
+        if old is _MISSING:
+            self._reshaped()
+        else:
+            _release(old, self)
+            self._replaced(key, old, value)
+
+    def __delitem__(self, key):
+        old = dict.__getitem__(self, key)
+        dict.__delitem__(self, key)
+        _release(old, self)
+        self._reshaped()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = dict.__getitem__(self, key)
+        del self[key]
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        _release(value, self)
+        self._reshaped()
+        return key, value
+
+    def clear(self):
+        for value in self.values():
+            _release(value, self)
+        dict.clear(self)
+        self._reshaped()
+
+
+class TrackedList(_Tracked, list):
+    """A ``list`` that records which of its items changed.
+
+    See ``TrackedDict``.  Replacing an item, appending and removing an
+    item at either end only mark that item; other changes encode the whole
+    list again the next time.
+    """
+
+    __slots__ = ('_parents', '_key', '_text', '_parts', '_stale',
+                 '_children')
+
+    def __init__(self, iterable=()):
+        list.__init__(self)
+        self._init_tracking()
+        self.extend(iterable)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            values = [_adopt(item, self) for item in value]
+            old = list.__getitem__(self, index)
+            list.__setitem__(self, index, values)
+            for item in old:
+                _release(item, self)
+            self._reshaped()
+            return
+        old = list.__getitem__(self, index)
+        value = _adopt(value, self)
+        list.__setitem__(self, index, value)
+        _release(old, self)
+        self._replaced(index % len(self), old, value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            old = list.__getitem__(self, index)
+            list.__delitem__(self, index)
+            for item in old:
+                _release(item, self)
+            self._reshaped()
+        else:
+            self.pop(index)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):
+        items = list(self)
+        if n <= 0:
+            self.clear()
+        else:
+            for _ in range(n - 1):
+                self.extend(items)
+        return self
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def append(self, value):
+        value = _adopt(value, self)
+        list.append(self, value)
+        parts = self._parts
+        # parts is [opener, item, separator, item, ..., closer]; a list of
+        # two or more items has a separator to copy.
+        if parts is not None and len(parts) >= 5:
+            position = len(self) - 1
+            parts[-1:-1] = (parts[2], None)
+            self._mark_stale(position)
+            if isinstance(value, _CONTAINER_TYPES):
+                if self._children is None:
+                    self._children = {}
+                _link_children(self._children, position, value)
+        else:
+            self._parts = None
+        _mark_changed(self)
+
+    def extend(self, iterable):
+        for value in iterable:
+            self.append(value)
+
+    def insert(self, index, value):
+        list.insert(self, index, _adopt(value, self))
+        self._reshaped()
+
+    def pop(self, index=-1):
+        value = list.pop(self, index)
+        _release(value, self)
+        parts = self._parts
+        size = len(self)
+        if (parts is not None and size >= 1 and not self._children
+                and not self._stale and (index == 0 or index in (-1, size))):
+            # Drop the item and one separator; no other position moves
+            # except by one when popping the first item, and nothing
+            # positional is recorded.
+            if index == 0:
+                del parts[1:3]
+            else:
+                del parts[-3:-1]
+            _mark_changed(self)
+        else:
+            self._reshaped()
+        return value
+
+    def remove(self, value):
+        self.pop(self.index(value))
+
+    def clear(self):
+        for item in self:
+            _release(item, self)
+        list.clear(self)
+        self._reshaped()
+
+    def sort(self, *, key=None, reverse=False):
+        list.sort(self, key=key, reverse=reverse)
+        self._reshaped()
+
+    def reverse(self):
+        list.reverse(self)
+        self._reshaped()
+
+
+# --- Memo cache for dumps_optimized ---
+
+_CACHEABLE_TYPES = (dict, list, tuple)
+
+
+class _Uncacheable(Exception):
+    """Raised by ``_snapshot`` for a tree with a leaf that is not a JSON
+    scalar, whose text could change without the snapshot noticing."""
+
+
+def _snapshot_leaf(value, memo):
+    if value is not None and not isinstance(value, (str, int, float)):
+        raise _Uncacheable
+    memo[id(value)] = value     # counted once by _snapshot_size
+    return value
+
+
+def _snapshot(obj, memo):
+    """Copy the container skeleton of ``obj`` (leaves are shared).
+
+    Shared sub-containers are copied once, like ``copy.deepcopy`` does, so
+    ``[NESTED] * 1000`` costs one copy of ``NESTED``.  ``memo`` ends up
+    holding every copy and every leaf; a leaf other than ``None``, ``str``,
+    ``int`` or ``float`` raises ``_Uncacheable``.
+    """
+    oid = id(obj)
+    copied = memo.get(oid)
+    if copied is not None:
+        return copied
+    if isinstance(obj, dict):
+        copied = memo[oid] = {}
+        for key, value in obj.items():
+            copied[key] = (_snapshot(value, memo)
+                           if isinstance(value, _CACHEABLE_TYPES) else
+                           _snapshot_leaf(value, memo))
+    elif isinstance(obj, list):
+        copied = memo[oid] = []
+        copied.extend([_snapshot(value, memo)
+                       if isinstance(value, _CACHEABLE_TYPES) else
+                       _snapshot_leaf(value, memo)
+                       for value in obj])
+    else:
+        copied = memo[oid] = tuple([
+            _snapshot(value, memo)
+            if isinstance(value, _CACHEABLE_TYPES) else
+            _snapshot_leaf(value, memo)
+            for value in obj])
+    return copied
+
+
+def _snapshot_size(memo):
+    """Bytes an entry keeps alive: the snapshot's containers twice (the
+    object's own are about the same size) plus each leaf once."""
+    size = 0
+    for value in memo.values():
+        if isinstance(value, _CACHEABLE_TYPES):
+            size += 2 * sys.getsizeof(value)
+        else:
+            size += sys.getsizeof(value)
+    return size
+
+
+class DumpsCache:
+    """Bounded memo cache used by ``dumps_optimized``.
+
+    Entries are keyed by ``id(obj)`` together with the encoder options.  An
+    entry keeps a strong reference to the object, so its id cannot be reused
+    by another object while the entry lives, and a snapshot of its container
+    skeleton.  Every hit compares the object with the snapshot (a C-level
+    ``==``), so in-place mutation of its containers drops the entry.  Only
+    trees of dicts, lists and tuples whose leaves are ``None``, ``str``,
+    ``int`` or ``float`` are cached: any other leaf (an object ``default``
+    would convert) is shared with the snapshot and could change unseen.
+
+    The comparison is ``==``, so two mutations are not seen: re-inserting a
+    dict key without changing its value (key order changes), and swapping a
+    value for an equal one of another type (``1`` -> ``True`` or ``1.0``).
+
+    ``max_entries`` bounds the number of entries and ``max_bytes`` their
+    estimated total size: the JSON text, the object's containers and their
+    snapshot, and the leaves.  ``policy`` is ``'lru'`` or ``'lfu'`` (least
+    frequently used, ties broken by recency).
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024,
+                 policy='lru'):
+        self._entries = OrderedDict()  # key -> [obj, snapshot, text, size, hits]
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.configure(max_entries=max_entries, max_bytes=max_bytes,
+                       policy=policy)
+
+    def configure(self, *, max_entries=None, max_bytes=None, policy=None):
+        """Change the limits or the policy, evicting entries if needed."""
+        if policy is not None and policy not in ('lru', 'lfu'):
+            raise ValueError(f"policy must be 'lru' or 'lfu', not {policy!r}")
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if policy is not None:
+                self.policy = policy
+            self._shrink(0, 0)
+
+    def get(self, key, obj):
+        """Return the cached text for ``obj`` or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if obj != entry[1]:
+                del self._entries[key]
+                self._bytes -= entry[3]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry[4] += 1
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, obj, text):
+        """Cache ``text`` as the encoding of ``obj`` under ``key``."""
+        size = sys.getsizeof(text)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        memo = {}
+        try:
+            snapshot = _snapshot(obj, memo)
+        except _Uncacheable:
+            return
+        size += _snapshot_size(memo)
+        del memo
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[3]
+            self._shrink(1, size)
+            self._entries[key] = [obj, snapshot, text, size, 0]
+            self._bytes += size
+
+    def _shrink(self, extra_entries, extra_bytes):
+        # Make room for extra_entries/extra_bytes; caller holds the lock.
+        entries = self._entries
+        while entries and (len(entries) + extra_entries > self.max_entries
+                           or self._bytes + extra_bytes > self.max_bytes):
+            if self.policy == 'lfu':
+                victim = min(entries, key=lambda k: entries[k][4])
+                entry = entries.pop(victim)
+            else:
+                entry = entries.popitem(last=False)[1]
+            self._bytes -= entry[3]
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self):
+        """Return a dict with the current size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'policy': self.policy,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache = DumpsCache()   # global cache per run
+
+
+def configure_cache(*, max_entries=None, max_bytes=None, policy=None):
+    """Reconfigure the ``dumps_optimized`` cache (see ``DumpsCache``)."""
+    _cache.configure(max_entries=max_entries, max_bytes=max_bytes,
+                     policy=policy)
+
+
+def cache_stats():
+    """Return hit/miss/eviction statistics of the ``dumps_optimized`` cache."""
+    return _cache.stats()
+
+
+def cache_clear():
+    """Empty the ``dumps_optimized`` cache."""
+    _cache.clear()
+
+
+def dumps_optimized(obj, *, skipkeys=False, ensure_ascii=True, check_circular=True,
+                   allow_nan=True, cls=None, indent=None, separators=None,
+                   default=None, sort_keys=False, memoize=False,
+                   specialize=False, **kw):
+    """
+    Optimized dumps with:
+    - Primitive fast-paths (None/True/False/int/float)
+    - Bounded, mutation-checked caching of repeated plain-JSON trees (see
+      DumpsCache; not with ``default`` or ``cls``)
+    - Optional per-call memoization of repeated sub-objects (``memoize``)
+    - Optional shape-specialized dict serializers (``specialize``)
+    - Fallback to standard JSONEncoder for all other cases
+    """
+
+    if separators is None and indent is None:
+        separators = (',', ':')
+
+    # Primitive fast path
+    if obj is None:
+        return "null"
+    if obj is True:
+        return "true"
+    if obj is False:
+        return "false"
+    if isinstance(obj, int):
+        return int.__repr__(obj)
+    if isinstance(obj, float):
+        return _floatstr_nan(obj) if allow_nan else _floatstr_strict(obj)
+    if isinstance(obj, str):
+        if ensure_ascii:
+            return encode_basestring_ascii(obj)
+        return encode_basestring(obj)
+
+    # Check cache (the key covers every option that changes the output).
+    # A default or encoder class may turn any object into JSON: not cached.
+    key = None
+    if (isinstance(obj, _CACHEABLE_TYPES) and not kw and default is None
+            and cls is None):
+        key = (id(obj), skipkeys, ensure_ascii, check_circular, allow_nan,
+               indent, separators, sort_keys)
+        try:
+            result = _cache.get(key, obj)
+        except TypeError:   # unhashable option value
+            key = None
+        else:
+            if result is not None:
+                return result
+
+    # Fallback: use the standard dumps (default encoder)
+    result = dumps(obj, skipkeys=skipkeys, ensure_ascii=ensure_ascii,
+                   check_circular=check_circular, allow_nan=allow_nan,
+                   cls=cls, indent=indent, separators=separators,
+                   default=default, sort_keys=sort_keys, memoize=memoize,
+                   specialize=specialize, **kw)
+
+    if key is not None:
+        _cache.put(key, obj, result)
+    return result
+
+
+# --- Backend registry for dumps_fast ---
+
+_Backend = namedtuple('_Backend', 'name encode supports strict')
+_Backend.__doc__ = """A dumps_fast backend.
+
+``supports(options)`` says whether ``encode(obj, kwargs)`` gives the same
+text as ``dumps(obj, **kwargs)`` for those options.  ``strict`` backends
+do so for every input; the others differ on documented value-level
+details (see ``dumps_fast``) and are only used with ``strict=False``.
+"""
+
+class _Unsupported(Exception):
+    """Raised by a backend for an input it cannot encode; ``dumps_fast``
+    then tries the next backend.  ``args[0]``, if given, maps ``id(o)`` to
+    ``(default(o), o)`` for the objects ``default`` has already seen."""
+
+
+def _replayed(default, seen):
+    """``default`` answering the objects in ``seen`` from there."""
+    def replay(o):
+        hit = seen.get(id(o))
+        if hit is not None and hit[1] is o:
+            return hit[0]
+        return default(o)
+    return replay
+
+
+_DUMPS_DEFAULTS = {
+    'skipkeys': False, 'ensure_ascii': True, 'check_circular': True,
+    'allow_nan': True, 'cls': None, 'indent': None, 'separators': None,
+    'default': None, 'sort_keys': False,
+}
+
+
+def _normalize_options(kwargs):
+    """Fill in the ``dumps`` defaults and the effective separators."""
+    options = dict(_DUMPS_DEFAULTS)
+    extra = {}
+    for name, value in kwargs.items():
+        if name in options:
+            options[name] = value
+        else:
+            extra[name] = value
+    options['extra'] = extra
+    options['raw_separators'] = options['separators']
+    if options['separators'] is None:
+        if options['indent'] is None:
+            options['separators'] = (', ', ': ')
+        else:
+            options['separators'] = (',', ': ')
+    else:
+        options['separators'] = tuple(options['separators'])
+    return options
+
+
+def _orjson_supports(o):
+    if (o['cls'] is not None or o['extra'] or o['skipkeys']
+            or o['ensure_ascii'] or not o['allow_nan']):
+        return False
+    if o['indent'] is None:
+        return o['separators'] == (',', ':')
+    return o['indent'] == 2 and o['separators'] == (',', ': ')
+
+
+def _orjson_raw_default(o):
+    """orjson ``default`` for ``RawJSON``: a native ``orjson.Fragment``
+    where available (orjson 3.9+), a placeholder literal otherwise."""
+    if isinstance(o, RawJSON):
+        if _orjson_fragment is not None:
+            return _orjson_fragment(o.text)
+        return _raw_placeholder(o)
+    raise TypeError(f'Type is not JSON serializable: {o.__class__.__name__}')
+
+
+def _orjson_default(default):
+    """Return an orjson ``default`` handling ``RawJSON``, then ``default``."""
+    if default is None:
+        return _orjson_raw_default
+
+    def orjson_default(o):
+        if isinstance(o, RawJSON):
+            return _orjson_raw_default(o)
+        return default(o)
+    return orjson_default
+
+
+def _orjson_encode(obj, kwargs):
+    option = _orjson.OPT_PASSTHROUGH_DATACLASS | _orjson.OPT_PASSTHROUGH_DATETIME
+    if kwargs.get('sort_keys'):
+        option |= _orjson.OPT_SORT_KEYS
+    if kwargs.get('indent') is not None:
+        option |= _orjson.OPT_INDENT_2
+    default = kwargs.get('default')
+    seen = {}
+    failed = []
+    if default is not None:
+        def recorded(o):
+            try:
+                value = default(o)
+            except BaseException as exc:
+                failed.append(exc)
+                raise
+            seen[id(o)] = value, o
+            return value
+    else:
+        recorded = None
+    # orjson returns bytes, so decode to string
+    encode = partial(_orjson.dumps, default=_orjson_default(recorded),
+                     option=option)
+    try:
+        return _encode_raw(lambda o: encode(o).decode('utf-8'), obj, False)
+    except (TypeError, ValueError, OverflowError) as exc:
+        if failed:
+            # orjson replaces what default() raised with its own TypeError
+            raise failed[0] from None
+        raise _Unsupported(seen) from exc
+
+
+def _ujson_supports(o):
+    return (o['cls'] is None and not o['extra'] and not o['skipkeys']
+            and not o['ensure_ascii'] and o['allow_nan']
+            and o['indent'] is None and o['default'] is None
+            and o['separators'] == (',', ':'))
+
+
+def _ujson_encode(obj, kwargs):
+    # RawJSON is written through its __json__ method.
+    try:
+        return _ujson.dumps(obj, ensure_ascii=False,
+                            escape_forward_slashes=False,
+                            sort_keys=bool(kwargs.get('sort_keys')))
+    except (TypeError, ValueError, OverflowError) as exc:
+        raise _Unsupported from exc
+
+
+def _optimized_supports(o):
+    # dumps_optimized switches to compact separators when neither
+    # separators nor indent is given.
+    return o['raw_separators'] is not None or o['indent'] is not None
+
+
+def _optimized_encode(obj, kwargs):
+    # Anything dumps_optimized rejects, dumps rejects too (after calling
+    # default() again), so its errors are final.
+    return dumps_optimized(obj, **kwargs)
+
+
+def _stdlib_encode(obj, kwargs):
+    return dumps(obj, **kwargs)
+
+
+def _build_backends():
+    """Resolve the installed backends once, fastest first."""
+    backends = []
+    if _orjson is not None:
+        backends.append(_Backend('orjson', _orjson_encode, _orjson_supports,
+                                 False))
+    if _ujson is not None:
+        backends.append(_Backend('ujson', _ujson_encode, _ujson_supports,
+                                 False))
+    backends.append(_Backend('optimized', _optimized_encode,
+                             _optimized_supports, False))
+    backends.append(_Backend('stdlib', _stdlib_encode, lambda o: True, True))
+    return tuple(backends)
+
+
+_BACKENDS = _build_backends()
+_dispatch_cache = {}
+_DISPATCH_CACHE_SIZE = 256
+
+
+def _select_backends(kwargs, strict):
+    """Return the eligible backends for ``kwargs``, fastest first."""
+    try:
+        key = (strict, tuple(sorted(kwargs.items())))
+        chain = _dispatch_cache.get(key)
+    except TypeError:   # unhashable option value
+        key = chain = None
+    if chain is None:
+        options = _normalize_options(kwargs)
+        chain = tuple(b for b in _BACKENDS
+                      if (b.strict or not strict) and b.supports(options))
+        if key is not None:
+            if len(_dispatch_cache) >= _DISPATCH_CACHE_SIZE:
+                _dispatch_cache.clear()
+            _dispatch_cache[key] = chain
+    return chain
+
+
+def fast_backends(**kwargs):
+    """Return the names of the backends ``dumps_fast`` would try, in order."""
+    strict = kwargs.pop('strict', True)
+    return [b.name for b in _select_backends(kwargs, strict)]
+
+
+def dumps_fast(obj, *, strict=True, **kwargs):
+    """
+    Fastest available JSON dumps giving the same text as ``dumps``.
+
+    The backends (orjson, ujson, dumps_optimized, stdlib) are resolved once
+    at import and each declares which option combinations it reproduces
+    exactly; a call goes to the fastest backend supporting its options.
+    If that backend rejects the input, the next one is tried, ending with
+    the stdlib encoder, which also raises the usual errors.  ``default``
+    is not called twice for an object: results it gave before a backend
+    gave up are reused by the next one.
+
+    With ``strict=True`` (the default) only backends that match ``dumps``
+    for every input are used.  Currently that is only the stdlib one, so
+    ``dumps_fast(obj)`` is ``dumps(obj)`` plus the dispatch; the faster
+    backends need ``strict=False``, which allows:
+
+    - orjson (compact separators or ``indent=2``, ``ensure_ascii=False``)
+      and ujson (compact, ``ensure_ascii=False``), which spell floats in
+      exponent form differently (``1e16`` rather than ``1e+16``), write
+      NaN and infinities as ``null`` and serialize some types natively
+      (e.g. ``uuid.UUID`` and ``enum.Enum``) instead of calling ``default``;
+    - dumps_optimized (explicit ``separators`` or ``indent``), whose cache
+      can miss the mutations described in ``DumpsCache``.
+    """
+    chain = _select_backends(kwargs, strict)
+    for backend in chain[:-1]:
+        try:
+            return backend.encode(obj, kwargs)
+        except _Unsupported as exc:
+            if exc.args and exc.args[0]:
+                kwargs = dict(kwargs, default=_replayed(kwargs['default'],
+                                                        exc.args[0]))
+    return chain[-1].encode(obj, kwargs)
+
+
+# --- NDJSON / batch serialization ---
+
+_NDJSON_BATCH_SIZE = 1000
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# Threads only run Python code in parallel on free-threaded builds.
+_FREE_THREADED = (hasattr(sys, '_is_gil_enabled')
+                  and not sys._is_gil_enabled())
+
+
+def _pool(kind, workers):
+    """Return a shared executor of class ``kind`` with ``workers`` workers."""
+    with _pools_lock:
+        pool = _pools.get((kind, workers))
+        if pool is None:
+            pool = _pools[kind, workers] = kind(workers)
+        return pool
+
+
+def worker_pool_shutdown(wait=True):
+    """Shut down the worker pools used by ``dumps_many`` and parallel ``dumps``.
+
+    They are created again on the next call that needs them.  This also
+    runs at interpreter exit.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+
+atexit.register(worker_pool_shutdown)
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _encode_batch(batch, kw):
+    """Encode a list of records as NDJSON lines (also run in workers)."""
+    if kw:
+        encode = partial(dumps, **kw)
+    else:
+        encode = _default_encoder.encode
+    return _encode_raw(lambda b: '\n'.join(map(encode, b)) + '\n', batch, True)
+
+
+def dumps_many(iterable, *, batch_size=_NDJSON_BATCH_SIZE, workers=None,
+               **kw):
+    """Serialize the records of ``iterable`` as newline-delimited JSON.
+
+    Yields one ``str`` per batch of ``batch_size`` records, each record
+    followed by ``'\n'``; ``kw`` are the ``dumps`` options (``indent`` is
+    not allowed, a record must fit on one line, and so must the text of any
+    ``RawJSON`` in it).  The input is consumed
+    lazily.
+
+    With ``workers=N`` batches are encoded in a pool of N processes (the
+    records and options must be picklable).  At most ``2 * N`` batches are
+    in flight and results are yielded in input order, so memory stays
+    bounded however long the input is.
+    """
+    if kw.get('indent') is not None:
+        raise ValueError('NDJSON records cannot be indented')
+    if batch_size < 1:
+        raise ValueError(f'batch_size must be positive, not {batch_size!r}')
+    batches = _batches(iterable, batch_size)
+    if not workers or workers <= 1:
+        for batch in batches:
+            yield _encode_batch(batch, kw)
+        return
+
+    pool = _pool(ProcessPoolExecutor, workers)
+    pending = deque()
+    try:
+        for batch in batches:
+            pending.append(pool.submit(_encode_batch, batch, kw))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def dump_ndjson(iterable, fp, *, batch_size=_NDJSON_BATCH_SIZE, workers=None,
+                **kw):
+    """Write the records of ``iterable`` to ``fp`` as newline-delimited JSON.
+
+    ``fp`` may be a text file, a binary file or a raw file descriptor as
+    for ``dump``; one write is made per batch.  The other arguments are as
+    for ``dumps_many``.
+    """
+    write = _stream_writer(fp)
+    binary = isinstance(fp, (int, io.RawIOBase, io.BufferedIOBase))
+    for chunk in dumps_many(iterable, batch_size=batch_size, workers=workers,
+                            **kw):
+        write(chunk.encode('utf-8') if binary else chunk)
+
+
+# --- Parallel encoding of large top-level containers ---
+
+_PARALLEL_THRESHOLD = 10_000
+
+
+def _encode_chunk(chunk, options):
+    """Encode a list or dict chunk and strip its brackets (runs in workers).
+
+    With ``indent`` the closing ``'\n'`` before the bracket is stripped too,
+    so chunks can be joined with the item separator alone.
+    """
+    text = dumps(chunk, **options)
+    if options.get('indent') is not None:
+        return text[1:-2]
+    return text[1:-1]
+
+
+def _encode_parallel(obj, workers, options):
+    """Encode a large list/tuple/dict by chunks in a worker pool.
+
+    The items are split into about four chunks per worker, each chunk is
+    encoded as a container of its own and the bracket-less bodies are
+    joined with the item separator, which is exactly the serial output.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        if options.get('sort_keys'):
+            items.sort()
+        opener, closer = '{', '}'
+    else:
+        items = obj
+        opener, closer = '[', ']'
+    size = -(-len(items) // (workers * 4))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    if opener == '{':
+        chunks = [dict(chunk) for chunk in chunks]
+    else:
+        chunks = [list(chunk) for chunk in chunks]
+
+    kind = ThreadPoolExecutor if _FREE_THREADED else ProcessPoolExecutor
+    pool = _pool(kind, workers)
+    bodies = list(pool.map(_encode_chunk, chunks,
+                           [options] * len(chunks)))
+
+    indent = options.get('indent')
+    separators = options.get('separators')
+    if separators is not None:
+        item_separator = separators[0]
+    elif indent is not None:
+        item_separator = ','
+    else:
+        item_separator = ', '
+    if indent is not None:
+        closer = '\n' + closer
+    return opener + item_separator.join(bodies) + closer
+
+
+# --- Bytes output ---
+
+def _text_stdlib(obj, kw):
+    return dumps(obj, **kw)
+
+
+def _text_optimized(obj, kw):
+    return dumps_optimized(obj, **kw)
+
+
+def _text_ujson(obj, kw):
+    return _ujson.dumps(obj, **kw)
+
+
+def _bytes_stdlib(obj, kw):
+    return _text_stdlib(obj, kw).encode('utf-8')
+
+
+def _bytes_optimized(obj, kw):
+    return _text_optimized(obj, kw).encode('utf-8')
+
+
+def _bytes_orjson(obj, kw):
+    # orjson writes UTF-8 bytes itself; map the few options it has.
+    option = kw.pop('option', 0)
+    if kw.pop('sort_keys', False):
+        option |= _orjson.OPT_SORT_KEYS
+    indent = kw.pop('indent', None)
+    if indent == 2:
+        option |= _orjson.OPT_INDENT_2
+    elif indent is not None:
+        raise ValueError(f'the orjson backend only supports indent=2, '
+                         f'not {indent!r}')
+    default = kw.pop('default', None)
+    if kw:
+        raise TypeError(f'options not supported by the orjson backend: '
+                        f'{", ".join(sorted(kw))}')
+    pending = _raw_state.pending
+    try:
+        data = _orjson.dumps(obj, default=_orjson_default(default), option=option)
+    except BaseException:
+        _raw_state.pending = pending
+        raise
+    if _raw_state.pending != pending:
+        data = _substitute_raw(data.decode('utf-8'), False).encode('utf-8')
+    return data
+
+
+def _bytes_ujson(obj, kw):
+    return _text_ujson(obj, kw).encode('utf-8')
+
+
+_BYTES_BACKENDS = {
+    'stdlib': _bytes_stdlib,
+    'optimized': _bytes_optimized,
+}
+# Backends that produce text, which encode_into encodes by chunks
+_TEXT_BACKENDS = {
+    'stdlib': _text_stdlib,
+    'optimized': _text_optimized,
+}
+if _orjson is not None:
+    _BYTES_BACKENDS['orjson'] = _bytes_orjson
+if _ujson is not None:
+    _BYTES_BACKENDS['ujson'] = _bytes_ujson
+    _TEXT_BACKENDS['ujson'] = _text_ujson
+
+
+def dumps_bytes(obj, *, backend='stdlib', **kw):
+    """Serialize ``obj`` to UTF-8 encoded JSON ``bytes``.
+
+    ``backend`` is ``'stdlib'`` (same text as ``dumps``), ``'optimized'``
+    (``dumps_optimized``), ``'orjson'`` or ``'ujson'`` when installed.  The
+    remaining keyword arguments are the options of that backend.  orjson
+    produces bytes directly, so nothing is decoded and re-encoded.
+    """
+    try:
+        encode = _BYTES_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f'unknown or unavailable backend {backend!r}; '
+                         f'available: {", ".join(_BYTES_BACKENDS)}') from None
+    return encode(obj, kw)
+
+
+def _write_ascii(target, pos, text):
+    """Write the ASCII ``text`` into ``target`` (a ``bytearray`` or a byte
+    ``memoryview``) at ``pos``, encoding ``_DUMP_BUFFER_SIZE`` characters
+    at a time.  A ``bytearray`` grows as the chunks go past its end."""
+    step = _DUMP_BUFFER_SIZE
+    for start in range(0, len(text), step):
+        chunk = text[start:start + step].encode('ascii')
+        target[pos + start:pos + start + len(chunk)] = chunk
+
+
+def encode_into(obj, buffer, offset=None, *, backend='stdlib', **kw):
+    """Serialize ``obj`` as UTF-8 JSON into ``buffer`` and return the size.
+
+    ``buffer`` is a reusable ``bytearray`` or a writable ``memoryview`` (or
+    any writable buffer).  A ``bytearray`` is appended to unless ``offset``
+    is given, and grows as needed when written at an ``offset`` no larger
+    than its length; anything else is written at ``offset`` (default 0)
+    and must be large enough.  Otherwise ``ValueError`` is raised and
+    ``buffer`` is left untouched.  ``backend`` and ``kw`` are as for
+    ``dumps_bytes``.
+
+    The backends that produce text (stdlib, optimized, ujson) give ASCII
+    with the default ``ensure_ascii``; it is encoded into ``buffer`` a
+    chunk at a time, so the UTF-8 document is never built as a separate
+    ``bytes``.  Non-ASCII text and the orjson backend make one ``bytes``
+    of the whole document, which is then copied into ``buffer``.
+    """
+    text_encode = _TEXT_BACKENDS.get(backend)
+    text = data = None
+    if text_encode is not None:
+        text = text_encode(obj, kw)
+        if not text.isascii():
+            data = text.encode('utf-8')
+            text = None
+    else:
+        data = dumps_bytes(obj, backend=backend, **kw)
+    size = len(text) if data is None else len(data)
+    if isinstance(buffer, bytearray):
+        if offset is None:
+            offset = len(buffer)
+        elif offset > len(buffer):
+            raise ValueError(f'offset {offset} is past the end of the '
+                             f'buffer ({len(buffer)} bytes)')
+        target = buffer
+    else:
+        target = memoryview(buffer)
+        if target.readonly:
+            raise TypeError('encode_into() needs a writable buffer')
+        target = target.cast('B')
+        if offset is None:
+            offset = 0
+        if offset + size > target.nbytes:
+            raise ValueError(f'buffer too small: need {offset + size} bytes, '
+                             f'have {target.nbytes}')
+    if data is None:
+        _write_ascii(target, offset, text)
+    else:
+        target[offset:offset + size] = data
+    return size
+
 
 # In order to run the fast dumps need to use the line below
 #json.dumps = dumps_fast